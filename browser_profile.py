@@ -0,0 +1,202 @@
+# browser_profile.py - 크롤링 간 유지되는 Chrome 프로필 관리
+import os
+import time
+import glob
+import shutil
+import threading
+import logging
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+logger = logging.getLogger(__name__)
+
+PROFILE_ROOT = os.path.expanduser("~/.cache/coupang_crawler/profiles")
+
+
+class ProfileManager:
+    """플랫폼/워커별 전용 user-data-dir 관리
+
+    - 프로필 하나는 동시에 Chrome 하나만 쓸 수 있으므로 슬롯 단위로 잠금
+      (OS 파일 잠금이라 프로세스가 죽으면 자동으로 풀림 - PID 재사용과 무관)
+    - 디스크 캐시 크기 제한, 쿠키는 작업 간 유지
+    - rotate_hours 가 지난 프로필은 다음 사용 시 새로 만든다
+    - cleanup_minutes 마다 사용 중이 아닌 오래된 프로필을 정리 (첫 acquire 때 정리 스레드 시작)
+    """
+
+    LOCK_FILE = ".crawler.lock"
+    CREATED_FILE = ".crawler.created"
+
+    def __init__(self, root=PROFILE_ROOT, max_workers=4, cache_size_mb=256, rotate_hours=24, cleanup_minutes=60):
+        self.root = root
+        self.max_workers = max_workers
+        self.cache_size_mb = cache_size_mb
+        self.rotate_hours = rotate_hours
+        self.cleanup_minutes = cleanup_minutes
+        self._lock = threading.Lock()
+        self._last_cleanup = 0.0
+        self._cleanup_thread = None
+        self._held = {}
+
+    def chrome_args(self, profile_dir):
+        """프로필 사용을 위한 Chrome 인자"""
+        return [
+            f"--user-data-dir={profile_dir}",
+            "--profile-directory=Default",
+            f"--disk-cache-size={self.cache_size_mb * 1024 * 1024}",
+        ]
+
+    def acquire(self, platform):
+        """사용 가능한 프로필 슬롯을 잠그고 경로 반환 (없으면 None)"""
+        # 영구 프로필을 실제로 쓸 때만 정리 스레드 시작
+        self.start_periodic_cleanup()
+        
+        with self._lock:
+            for worker in range(self.max_workers):
+                profile_dir = os.path.join(self.root, platform, f"worker-{worker}")
+                os.makedirs(profile_dir, exist_ok=True)
+
+                if not self._try_lock(profile_dir):
+                    continue
+
+                self._rotate_if_stale(profile_dir)
+                self._clear_singleton_locks(profile_dir)
+                logger.info(f"🗂️ 브라우저 프로필 사용: {profile_dir}")
+                return profile_dir
+
+        logger.warning(f"⚠️ 사용 가능한 {platform} 프로필 슬롯 없음 ({self.max_workers}개 모두 사용 중)")
+        return None
+
+    def release(self, profile_dir):
+        """프로필 슬롯 잠금 해제 - 잠금 파일은 남겨 둔다 (지우면 다른 프로세스가 옛 파일을 잠글 수 있음)"""
+        fd = self._held.pop(profile_dir, None)
+        if fd is None:
+            return
+        try:
+            _unlock(fd)
+        finally:
+            os.close(fd)
+
+    def cleanup(self):
+        """사용 중이 아니면서 rotate_hours 가 지난 프로필 삭제 - 주기 작업용"""
+        removed = 0
+        with self._lock:
+            for profile_dir in glob.glob(os.path.join(self.root, "*", "worker-*")):
+                if not self._try_lock(profile_dir):
+                    continue
+                try:
+                    if self._is_stale(profile_dir):
+                        shutil.rmtree(profile_dir, ignore_errors=True)
+                        removed += 1
+                finally:
+                    self.release(profile_dir)
+
+        self._last_cleanup = time.time()
+        logger.info(f"🧹 오래된 프로필 {removed}개 정리")
+        return removed
+
+    def maybe_cleanup(self):
+        """마지막 정리 후 cleanup_minutes 가 지났으면 정리"""
+        if time.time() - self._last_cleanup >= self.cleanup_minutes * 60:
+            self.cleanup()
+
+    def start_periodic_cleanup(self):
+        """cleanup_minutes 마다 정리하는 백그라운드 스레드 시작 (한 번만)"""
+        def loop():
+            while True:
+                try:
+                    self.maybe_cleanup()
+                except Exception as e:
+                    logger.warning(f"프로필 정리 중 오류: {e}")
+                time.sleep(self.cleanup_minutes * 60)
+
+        with self._lock:
+            if self._cleanup_thread is None:
+                self._cleanup_thread = threading.Thread(target=loop, daemon=True)
+                self._cleanup_thread.start()
+
+    def _try_lock(self, profile_dir):
+        lock_path = os.path.join(profile_dir, self.LOCK_FILE)
+        try:
+            fd = os.open(lock_path, os.O_RDWR | os.O_CREAT, 0o644)
+        except OSError:
+            return False
+
+        try:
+            if not _lock(fd):
+                os.close(fd)
+                return False
+            # 잠그는 사이 cleanup 으로 파일이 지워지고 새로 만들어졌으면 옛 파일을 잠근 것
+            if os.fstat(fd).st_ino != os.stat(lock_path).st_ino:
+                _unlock(fd)
+                os.close(fd)
+                return False
+        except OSError:
+            os.close(fd)
+            return False
+
+        # pid 는 사람이 확인하기 위한 정보 (잠금 판단에는 쓰지 않음)
+        os.ftruncate(fd, 0)
+        os.write(fd, str(os.getpid()).encode())
+        self._held[profile_dir] = fd
+        return True
+
+    def _is_stale(self, profile_dir):
+        try:
+            with open(os.path.join(profile_dir, self.CREATED_FILE)) as f:
+                created = float(f.read().strip())
+        except (OSError, ValueError):
+            return True
+        return time.time() - created > self.rotate_hours * 3600
+
+    def _rotate_if_stale(self, profile_dir):
+        if not self._is_stale(profile_dir):
+            return
+
+        logger.info(f"🔄 프로필 교체: {profile_dir}")
+        for name in os.listdir(profile_dir):
+            if name.startswith(self.LOCK_FILE):
+                continue
+            path = os.path.join(profile_dir, name)
+            if os.path.isdir(path) and not os.path.islink(path):
+                shutil.rmtree(path, ignore_errors=True)
+            else:
+                os.remove(path)
+
+        with open(os.path.join(profile_dir, self.CREATED_FILE), "w") as f:
+            f.write(str(time.time()))
+
+    @staticmethod
+    def _clear_singleton_locks(profile_dir):
+        # 비정상 종료된 Chrome 이 남긴 잠금 파일 제거
+        for path in glob.glob(os.path.join(profile_dir, "Singleton*")):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+
+def _lock(fd):
+    """비차단 배타 잠금 - 다른 곳에서 잠갔으면 False"""
+    try:
+        if fcntl:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        else:
+            msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+        return True
+    except OSError:
+        return False
+
+
+def _unlock(fd):
+    try:
+        if fcntl:
+            fcntl.flock(fd, fcntl.LOCK_UN)
+        else:
+            os.lseek(fd, 0, os.SEEK_SET)
+            msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+    except OSError:
+        pass
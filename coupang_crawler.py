@@ -4,22 +4,385 @@ import random
 import urllib.parse
 import re
 import os
+import json
+import queue
+import shutil
+import subprocess
+import threading
+import multiprocessing
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from datetime import datetime
-from bs4 import BeautifulSoup
 import logging
-from selenium import webdriver
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
+
+import network_capture
+
+# selenium / bs4 는 무거워서 실제로 필요한 시점에 import (콜드 스타트 단축)
 
 # 로깅 설정
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# 확인된 chromedriver / Chrome 경로 캐시 (워커 프로세스 간 공유)
+DRIVER_CACHE_FILE = os.path.expanduser("~/.cache/coupang_crawler/driver_paths.json")
+
+
+class ChromeDriverFactory:
+    """chromedriver / Chrome 경로를 한 번만 확인해 두고 드라이버를 생성하는 팩토리
+    
+    webdriver.Chrome() 이 매번 Selenium Manager 탐색을 하지 않도록
+    경로를 Service 에 직접 넘긴다. 캐시는 Chrome 버전별로 유효하며,
+    세션 생성이 실패하면 캐시를 지우고 경로를 다시 확인한다.
+    """
+
+    def __init__(self, cache_file=DRIVER_CACHE_FILE):
+        self.cache_file = cache_file
+        self._lock = threading.Lock()
+        self._paths = None
+
+    def paths(self):
+        """(driver_path, browser_path) 반환 - 최초 1회만 확인"""
+        with self._lock:
+            if self._paths is None:
+                self._paths = self._load_cached() or self._resolve()
+        return self._paths
+
+    def invalidate(self):
+        """캐시된 경로 폐기 - 다음 paths() 호출 시 다시 확인"""
+        with self._lock:
+            self._paths = None
+            try:
+                os.remove(self.cache_file)
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                logger.warning(f"⚠️ 드라이버 경로 캐시 삭제 실패: {e}")
+
+    def _load_cached(self):
+        try:
+            with open(self.cache_file, encoding="utf-8") as f:
+                cached = json.load(f)
+        except (OSError, ValueError):
+            return None
+        
+        driver_path = cached.get("driver_path")
+        browser_path = cached.get("browser_path")
+        if not driver_path or not os.path.isfile(driver_path):
+            return None
+        if browser_path and not os.path.isfile(browser_path):
+            return None
+        
+        # Chrome 자동 업데이트 후에는 chromedriver 버전이 맞지 않으므로 다시 확인
+        browser_version = self._browser_version(browser_path)
+        if browser_version != cached.get("browser_version"):
+            logger.info(f"🔄 Chrome 버전 변경 ({cached.get('browser_version')} → {browser_version}) - 드라이버 경로 재확인")
+            return None
+        
+        logger.info(f"⚡ 캐시된 chromedriver 사용: {driver_path}")
+        return driver_path, browser_path
+
+    @staticmethod
+    def _find_browser():
+        return os.environ.get("CHROME_BINARY") or next(
+            (path for path in map(shutil.which, ["google-chrome", "google-chrome-stable", "chromium", "chromium-browser"]) if path),
+            None
+        )
+
+    @staticmethod
+    def _browser_version(browser_path):
+        if not browser_path:
+            return None
+        try:
+            out = subprocess.run([browser_path, "--version"], capture_output=True, text=True, timeout=10).stdout
+        except (OSError, subprocess.SubprocessError):
+            return None
+        lines = out.strip().splitlines()
+        return lines[0] if lines else None
+
+    def _resolve(self):
+        logger.info("🔎 chromedriver / Chrome 경로 확인 중...")
+        
+        browser_path = self._find_browser()
+        
+        driver_path = os.environ.get("CHROMEDRIVER_PATH")
+        if not driver_path:
+            try:
+                from webdriver_manager.chrome import ChromeDriverManager
+                driver_path = ChromeDriverManager().install()
+            except Exception as e:
+                logger.warning(f"⚠️ webdriver-manager 경로 확인 실패 - Selenium Manager 사용: {e}")
+                return None, browser_path
+        
+        try:
+            os.makedirs(os.path.dirname(self.cache_file), exist_ok=True)
+            with open(self.cache_file, "w", encoding="utf-8") as f:
+                json.dump({
+                    "driver_path": driver_path,
+                    "browser_path": browser_path,
+                    "browser_version": self._browser_version(browser_path)
+                }, f)
+        except OSError as e:
+            logger.warning(f"⚠️ 드라이버 경로 캐시 저장 실패: {e}")
+        
+        logger.info(f"✅ chromedriver: {driver_path}, Chrome: {browser_path}")
+        return driver_path, browser_path
+
+    def create(self, options):
+        """캐시된 경로로 Chrome 드라이버 생성"""
+        from selenium import webdriver
+        from selenium.webdriver.chrome.service import Service
+        
+        for attempt in range(2):
+            driver_path, browser_path = self.paths()
+            if browser_path:
+                options.binary_location = browser_path
+            
+            service = Service(executable_path=driver_path) if driver_path else Service()
+            try:
+                return webdriver.Chrome(service=service, options=options)
+            except Exception as e:
+                if attempt or not driver_path:
+                    raise
+                logger.warning(f"⚠️ 캐시된 chromedriver 로 세션 생성 실패 - 경로 재확인 후 재시도: {e}")
+                self.invalidate()
+
+
+_default_factory = None
+_default_factory_lock = threading.Lock()
+
+
+def get_driver_factory():
+    """프로세스 전역 드라이버 팩토리"""
+    global _default_factory
+    with _default_factory_lock:
+        if _default_factory is None:
+            _default_factory = ChromeDriverFactory()
+    return _default_factory
+
+
+# 로드 완료 후 파싱을 기다리는 페이지 최대 수 (fetch → parse 사이 버퍼)
+PIPELINE_DEPTH = 2
+
+_parse_pool = None
+_parse_pool_lock = threading.Lock()
+
+
+def get_parse_pool():
+    """프로세스 전역 파싱 풀 - BeautifulSoup 파싱을 GIL 밖에서 여러 코어로 실행"""
+    global _parse_pool
+    with _parse_pool_lock:
+        if _parse_pool is None:
+            # 스레드가 많은 Streamlit 프로세스에서 fork 는 위험하므로 spawn 사용
+            _parse_pool = ProcessPoolExecutor(mp_context=multiprocessing.get_context("spawn"))
+    return _parse_pool
+
+
+def _replace_parse_pool(broken):
+    """깨진 풀(자식 프로세스 비정상 종료 등) 폐기 - 다음 get_parse_pool 에서 새로 생성"""
+    global _parse_pool
+    with _parse_pool_lock:
+        if _parse_pool is broken:
+            _parse_pool = None
+    broken.shutdown(wait=False)
+
+
+def submit_parse(*args):
+    """_parse_serp 를 파싱 풀에 제출
+
+    풀이 깨졌으면 새 풀로 교체해 한 번 더 시도하고, 그래도 실패하면 BrokenProcessPool 로 끝난
+    Future 를 반환한다 (순위 단계가 현재 스레드에서 파싱).
+    """
+    for _ in range(2):
+        pool = get_parse_pool()
+        try:
+            return pool.submit(_parse_serp, *args)
+        except BrokenProcessPool as e:
+            logger.warning(f"⚠️ 파싱 프로세스 풀 손상 - 새 풀로 교체: {e}")
+            _replace_parse_pool(pool)
+            error = e
+    
+    future = Future()
+    future.set_exception(error)
+    return future
+
+
+# 큐가 가득 찼을 때 순위 단계가 살아 있는지 확인하는 주기 (초)
+PIPELINE_POLL = 1.0
+
+
+class _LogCollector(logging.Handler):
+    """파싱 프로세스의 로그를 모아 부모 프로세스로 돌려보내기 위한 핸들러"""
+
+    def __init__(self):
+        super().__init__()
+        self.records = []
+
+    def emit(self, record):
+        self.records.append((record.levelno, record.getMessage()))
+
+
+def _parse_serp(platform, serp, kw, page, prod, item, vend, collect_logs=True):
+    """파싱 단계 (풀 프로세스에서 실행) - (순위 결과, 전체 카드 레코드, 로그) 반환
+
+    풀 프로세스의 로그는 앱 로그 패널에 닿지 않으므로 (level, message) 목록으로 모아
+    반환하고, 부모 프로세스가 다시 기록한다. collect_logs=False 면 바로 기록한다.
+    """
+    records = []
+    parser = CoupangCrawler(platform=platform)
+    if not collect_logs:
+        return parser.rank_serp(serp, kw, page, prod, item, vend, capture=records), records, []
+
+    collector = _LogCollector()
+    loggers = [logger, logging.getLogger("network_capture")]
+    for log in loggers:
+        log.addHandler(collector)
+        log.propagate = False
+    try:
+        result = parser.rank_serp(serp, kw, page, prod, item, vend, capture=records)
+    finally:
+        for log in loggers:
+            log.removeHandler(collector)
+            log.propagate = True
+    return result, records, collector.records
+
+
+def rank_pages(fetch, platform, kw, ids, pages, capture=None, cancelled=None):
+    """페이지 로드(호출 스레드) → 파싱(프로세스 풀) → 순위 확정(순위 스레드) 파이프라인
+
+    fetch(page) 는 fetch 결과 dict 또는 None 을 반환한다. 이전 페이지를 파싱하는 동안
+    다음 페이지를 로드하며, 대상 상품을 찾으면 cancelled 를 설정해 남은 페이지를 건너뛴다
+    (capture 가 있으면 pages 까지 계속 수집).
+
+    (순위 결과, 로드에 성공한 페이지 수, 로드 중 발생한 예외 또는 None) 반환.
+    """
+    prod, item, vend = ids
+    cancelled = cancelled or threading.Event()
+    parsed = queue.Queue(maxsize=PIPELINE_DEPTH)
+    job_args = {}
+    found = None
+    error = None
+    
+    def rank_stage():
+        """파싱 결과를 페이지 순서대로 받아 순위 확정 - 한 페이지의 오류로 멈추지 않음"""
+        nonlocal found
+        while True:
+            job = parsed.get()
+            if job is None:
+                return
+            
+            p, future = job
+            try:
+                if cancelled.is_set():
+                    future.cancel()
+                    continue
+                
+                try:
+                    result, records, logs = future.result()
+                    for level, message in logs:
+                        logger.log(level, message)
+                except Exception as e:
+                    logger.warning(f"⚠️ 파싱 프로세스 오류 - 현재 스레드에서 파싱: {e}")
+                    result, records, _ = _parse_serp(*job_args[p], collect_logs=False)
+                
+                if capture is not None:
+                    capture.extend(records)
+                
+                if result and not found:
+                    found = result
+                    if capture is None:
+                        logger.info("🛑 남은 페이지 요청 취소")
+                        cancelled.set()
+            except Exception as e:
+                logger.error(f"❌ 페이지 {p} 파싱 실패: {e}")
+    
+    ranker = threading.Thread(target=rank_stage, daemon=True)
+    ranker.start()
+    
+    def hand_off(job):
+        """순위 단계로 작업 전달 - 순위 단계가 죽었으면 막히지 않고 False"""
+        while ranker.is_alive():
+            try:
+                parsed.put(job, timeout=PIPELINE_POLL)
+                return True
+            except queue.Full:
+                continue
+        return False
+    
+    try:
+        # 페이지별 로드 - 파싱은 풀에 넘기고 바로 다음 페이지로
+        for p in range(1, pages + 1):
+            if cancelled.is_set():
+                break
+            
+            logger.info(f"\n📄 페이지 {p}/{pages} 검색 시작")
+            logger.info("-" * 40)
+            
+            serp = fetch(p)
+            if serp is None:
+                if not cancelled.is_set():
+                    logger.warning(f"⚠️ 페이지 {p} 로드 실패 - 다음 페이지로 이동")
+                continue
+            
+            job_args[p] = (platform, serp, kw, p, prod, item, vend)
+            if not hand_off((p, submit_parse(*job_args[p]))):
+                raise RuntimeError("순위 계산 단계가 중단됨")
+    except Exception as e:
+        error = e
+    finally:
+        hand_off(None)
+        ranker.join()
+    
+    return found, len(job_args), error
+
+
+class CrawlError(Exception):
+    """순위 미노출이 아니라 크롤링 자체가 실패한 경우"""
+
+
 class CoupangCrawler:
-    def __init__(self, platform="pc", incog=True, delay=8, headless=True):
+    # 차단/CAPTCHA 페이지 표식 - 본문 단어가 아니라 차단 페이지 자체의 제목, URL, 요소로 판단
+    # (본문 검사만 하면 "로봇청소기" 같은 정상 검색 결과도 차단으로 오인)
+    BLOCK_TITLES = ("access denied", "captcha", "robot check", "보안 확인", "접근이 거부")
+    BLOCK_URL_PATTERN = re.compile(r"/(captcha|challenge|blocked)\b|perimeterx|_incapsula_", re.IGNORECASE)
+    BLOCK_SELECTORS = (
+        "iframe[src*='captcha']",
+        "iframe[src*='recaptcha']",
+        "#captcha",
+        "#px-captcha",
+        ".g-recaptcha",
+        ".h-captcha",
+    )
+    # 차단 표식이 없을 때 참고용으로만 로깅하는 단어
+    BLOCK_HINT_WORDS = ("captcha", "로봇이 아닙니다", "robot", "verification")
+
+    # 플랫폼별 상품 카드 선택자 (앞쪽 우선)
+    CARD_SELECTORS = {
+        "android": (
+            "li.plp-default__item",
+            ".search-product-item",
+            "[data-product-id]",
+            ".product-item"
+        ),
+        "pc": (
+            "li.ProductUnit_productUnit__Qd6sv",
+            "dl[data-product-id]",
+            "li.search-product",
+            "div.search-product",
+            "li[data-product-id]",
+            "div[data-product-id]",
+            ".search-product-wrap",
+            ".product-item"
+        ),
+    }
+
+    def __init__(self, platform="pc", incog=True, delay=8, headless=True, factory=None, profiles=None, extract="dom", proxies=None):
         self.platform = platform
+        self.extract = extract
+        self.factory = factory or get_driver_factory()
+        self.profiles = profiles
+        self.profile_dir = None
+        self.proxies = proxies
+        self.proxy = None
         self.delay = delay
         self.driver = None
         self.incog = incog
@@ -27,6 +390,8 @@ class CoupangCrawler:
         self.ua = self._get_stable_ua()
         self.win = "1920,1080" if platform == "pc" else "412,915"
         self.screenshot_count = 0
+        self.last_screenshot = None
+        self.cancelled = threading.Event()
 
     def _get_stable_ua(self):
         """더 안정적인 User-Agent 반환"""
@@ -37,12 +402,20 @@ class CoupangCrawler:
 
     def _opts(self):
         """개선된 Chrome 옵션"""
+        from selenium.webdriver.chrome.options import Options
+        
         options = Options()
         
         if self.incog:
             options.add_argument("--incognito")
+        elif self.profile_dir:
+            # 영구 프로필 - 캐시/쿠키를 크롤링 간 재사용
+            for arg in self.profiles.chrome_args(self.profile_dir):
+                options.add_argument(arg)
         if self.headless:
             options.add_argument("--headless=new")
+        if self.proxy:
+            options.add_argument(f"--proxy-server={self.proxy}")
         
         # 기본 옵션들
         options.add_argument("--no-sandbox")
@@ -62,7 +435,11 @@ class CoupangCrawler:
         options.add_experimental_option("excludeSwitches", ["enable-automation"])
         options.add_experimental_option('useAutomationExtension', False)
         
-        logger.info(f"🔧 Chrome 옵션 설정 완료 - 플랫폼: {self.platform}, 헤드리스: {self.headless}")
+        # 네트워크 JSON 추출 모드
+        if self.extract == "network":
+            network_capture.enable_network_logging(options)
+        
+        logger.info(f"🔧 Chrome 옵션 설정 완료 - 플랫폼: {self.platform}, 헤드리스: {self.headless}, 프록시: {self.proxy or '없음'}")
         
         return options
 
@@ -70,8 +447,19 @@ class CoupangCrawler:
         """개선된 드라이버 빌드"""
         logger.info(f"🚀 Chrome 드라이버 생성 시작 - {self.platform}")
         try:
+            if self.profiles is not None:
+                if self.incog:
+                    logger.warning("⚠️ 시크릿 모드에서는 영구 프로필을 사용하지 않음")
+                elif self.profile_dir is None:
+                    self.profile_dir = self.profiles.acquire(self.platform)
+            
+            if self.proxies is not None and self.proxy is None:
+                self.proxy = self.proxies.acquire()
+                if self.proxy is None:
+                    raise RuntimeError("사용 가능한 프록시 없음")
+            
             options = self._opts()
-            self.driver = webdriver.Chrome(options=options)
+            self.driver = self.factory.create(options)
             
             # 웹드라이버 탐지 방지 스크립트
             logger.info("🛡️ 웹드라이버 탐지 방지 스크립트 실행")
@@ -91,16 +479,44 @@ class CoupangCrawler:
             
         except Exception as e:
             logger.error(f"❌ 드라이버 생성 실패: {e}")
+            self._quit()
             return False
 
-    def _take_screenshot(self, filename_prefix="debug"):
-        """스크린샷 캡처"""
+    def _quit(self):
+        """드라이버 종료 및 프로필 잠금 해제"""
+        if self.driver:
+            try:
+                self.driver.quit()
+            except Exception as e:
+                logger.warning(f"드라이버 종료 중 오류: {e}")
+            self.driver = None
+        
+        if self.profile_dir:
+            self.profiles.release(self.profile_dir)
+            self.profile_dir = None
+        
+        if self.proxy:
+            self.proxies.release(self.proxy)
+            self.proxy = None
+
+    def _report_proxy(self, ok, latency=None, blocked=False):
+        """프록시 풀에 요청 결과 보고"""
+        if self.proxy:
+            self.proxies.report(self.proxy, ok, latency=latency, blocked=blocked)
+
+    def _take_screenshot(self, filename_prefix="debug", source=None):
+        """스크린샷 캡처 - source(fetch 단계에서 찍어 둔 화면)가 있으면 드라이버 없이 그 파일을 복사"""
+        if not self.driver and not source:
+            return None
         try:
             self.screenshot_count += 1
             timestamp = datetime.now().strftime("%H%M%S")
             filename = f"/tmp/{filename_prefix}_{self.platform}_{timestamp}_{self.screenshot_count}.png"
             
-            self.driver.save_screenshot(filename)
+            if source:
+                shutil.copyfile(source, filename)
+            else:
+                self.driver.save_screenshot(filename)
             logger.info(f"📸 스크린샷 저장: {filename}")
             return filename
         except Exception as e:
@@ -109,9 +525,16 @@ class CoupangCrawler:
 
     def _load(self, url):
         """개선된 페이지 로드 - 스크린샷 포함"""
+        from selenium.webdriver.support.ui import WebDriverWait
+        
         logger.info(f"🌐 페이지 로드 시작: {url}")
         
         for attempt in range(3):
+            # 차단된 프록시를 교체한 경우 드라이버 재생성
+            if self.driver is None and not self._build():
+                return False
+            
+            started = time.time()
             try:
                 logger.info(f"📡 시도 {attempt + 1}/3: 페이지 요청 중...")
                 self.driver.get(url)
@@ -121,34 +544,47 @@ class CoupangCrawler:
                 WebDriverWait(self.driver, 20).until(
                     lambda driver: driver.execute_script("return document.readyState") == "complete"
                 )
+                latency = time.time() - started
+                blocked = False
                 
-                # 로드 후 스크린샷
-                self._take_screenshot(f"loaded_page_{attempt}")
+                # 로드 후 스크린샷 - 파싱 단계의 found_rank / no_products 스크린샷에도 사용
+                self.last_screenshot = self._take_screenshot(f"loaded_page_{attempt}")
                 
                 # 페이지 기본 정보 수집
                 try:
                     page_title = self.driver.title
                     current_url = self.driver.current_url
-                    page_source_length = len(self.driver.page_source)
+                    page_source = self.driver.page_source
                     
                     logger.info(f"📋 페이지 정보:")
                     logger.info(f"   - 제목: {page_title}")
                     logger.info(f"   - 현재 URL: {current_url}")
-                    logger.info(f"   - HTML 크기: {page_source_length:,} bytes")
+                    logger.info(f"   - HTML 크기: {len(page_source):,} bytes")
                     
-                    # CAPTCHA 또는 차단 확인
-                    page_text = self.driver.page_source.lower()
-                    if any(keyword in page_text for keyword in ['captcha', '로봇이 아닙니다', 'robot', 'verification']):
-                        logger.error("🚫 CAPTCHA 또는 접근 제한 페이지 감지됨!")
+                    # CAPTCHA 또는 차단 확인 - 차단 페이지 표식이 있을 때만 차단으로 보고
+                    marker = self._block_marker(page_title, current_url)
+                    if marker:
+                        logger.error(f"🚫 CAPTCHA 또는 접근 제한 페이지 감지됨! ({marker})")
                         self._take_screenshot(f"captcha_detected_{attempt}")
+                        blocked = True
+                    elif any(word in page_source.lower() for word in self.BLOCK_HINT_WORDS):
+                        logger.info("ℹ️ 페이지에 CAPTCHA 관련 단어가 있으나 차단 표식은 없음 - 정상 페이지로 처리")
                         
                 except Exception as e:
                     logger.warning(f"페이지 정보 수집 중 오류: {e}")
                 
+                self._report_proxy(ok=not blocked, latency=latency, blocked=blocked)
+                if blocked and self.proxy:
+                    logger.warning(f"🔄 차단된 프록시 교체 후 재시도: {self.proxy}")
+                    self._quit()
+                    continue
+                
                 # 딜레이 적용
                 wait_time = random.uniform(self.delay, self.delay + 3)
                 logger.info(f"😴 {wait_time:.1f}초 대기 중...")
-                time.sleep(wait_time)
+                if self.cancelled.wait(wait_time):
+                    logger.info("🛑 페이지 로드 취소됨")
+                    return False
                 
                 # 상품 로드 대기
                 self._wait_for_products()
@@ -157,6 +593,7 @@ class CoupangCrawler:
                 return True
                 
             except Exception as e:
+                self._report_proxy(ok=False)
                 logger.warning(f"⚠️ 페이지 로드 시도 {attempt + 1} 실패: {e}")
                 if attempt < 2:
                     logger.info(f"🔄 5초 후 재시도...")
@@ -166,8 +603,32 @@ class CoupangCrawler:
                     
         return False
 
+    def _block_marker(self, title, url):
+        """차단 페이지 표식(제목, URL, CAPTCHA 요소) 설명 반환 - 없으면 None"""
+        title_lower = (title or "").lower()
+        for marker in self.BLOCK_TITLES:
+            if marker in title_lower:
+                return f"제목: {title}"
+        
+        # 검색어가 URL 에 들어가므로 쿼리 문자열은 제외하고 경로만 확인
+        if self.BLOCK_URL_PATTERN.search(urllib.parse.urlparse(url or "").path):
+            return f"URL: {url}"
+        
+        # find_elements 는 implicitly_wait 만큼 기다리므로 스크립트 한 번으로 확인
+        selector = self.driver.execute_script(
+            "return arguments[0].find(s => document.querySelector(s) !== null) || null;",
+            list(self.BLOCK_SELECTORS)
+        )
+        if selector:
+            return f"요소: {selector}"
+        return None
+
     def _wait_for_products(self):
         """상품 카드 로드 대기"""
+        from selenium.webdriver.common.by import By
+        from selenium.webdriver.support.ui import WebDriverWait
+        from selenium.webdriver.support import expected_conditions as EC
+        
         logger.info("🛍️ 상품 카드 로드 대기 중...")
         
         try:
@@ -198,94 +659,225 @@ class CoupangCrawler:
         except Exception as e:
             logger.warning(f"상품 로드 대기 중 오류: {e}")
 
-    def rank(self, kw, tgt_url, pages=5):
-        """개선된 순위 검색 - 디버깅 강화 버전"""
+    def _search_url(self, kw, page):
+        """플랫폼별 검색 URL"""
+        if self.platform == "android":
+            base = "https://m.coupang.com/nm/search?q="
+        else:
+            base = "https://www.coupang.com/np/search?q="
+        return f"{base}{urllib.parse.quote(kw)}&page={page}"
+
+    def fetch(self, kw, page):
+        """검색 결과 한 페이지 로드 - 드라이버는 필요 시 생성 후 재사용
+        
+        {"html": 페이지 HTML, "records": 네트워크 JSON 에서 얻은 카드 레코드 또는 None,
+        "screenshot": 로드 직후 스크린샷 경로 또는 None} 반환, 실패 시 None.
+        반환값은 드라이버 없이 rank_serp / capture_serp 로 파싱할 수 있다.
+        """
+        if self.cancelled.is_set():
+            return None
+        if self.driver is None and not self._build():
+            logger.error("❌ 드라이버 빌드 실패")
+            return None
+        
+        url = self._search_url(kw, page)
+        logger.info(f"🔗 검색 URL: {url}")
+        self.last_screenshot = None
+        
+        try:
+            if self.extract == "network":
+                network_capture.drain(self.driver)
+            
+            if not self._load(url):
+                return None
+            
+            records = None
+            if self.extract == "network":
+                records = self._network_records(kw, page)
+            
+            return {"html": self.driver.page_source, "records": records, "screenshot": self.last_screenshot}
+        except Exception as e:
+            logger.error(f"💥 페이지 {page} 로드 중 오류: {e}")
+            self._quit()
+            return None
+
+    def _network_records(self, kw, page):
+        """네트워크 로그의 검색 JSON 에서 카드 레코드 추출 - 없거나 DOM 카드와 맞지 않으면 None (DOM 파싱으로 대체)"""
+        try:
+            responses = network_capture.collect_json_responses(self.driver)
+        except Exception as e:
+            logger.warning(f"⚠️ 네트워크 로그 수집 실패 - DOM 파싱 사용: {e}")
+            return None
+        
+        candidates = [
+            records
+            for _, data in responses
+            for records in network_capture.payload_candidates(data, kw, self.platform, page)
+        ]
+        if not candidates:
+            logger.info("📡 검색 JSON 에서 상품 목록을 찾지 못함 - DOM 파싱 사용")
+            return None
+        
+        # 추천/연관 상품 JSON 을 검색 결과로 오인하지 않도록 화면의 카드와 대조
+        try:
+            dom_ids = self._dom_product_ids()
+        except Exception as e:
+            logger.warning(f"⚠️ DOM 카드 ID 수집 실패 - DOM 파싱 사용: {e}")
+            return None
+        
+        records = network_capture.select_search_records(candidates, dom_ids)
+        if records is None:
+            logger.warning(f"⚠️ 검색 JSON 상품 목록이 DOM 카드 {len(dom_ids)}개와 일치하지 않음 - DOM 파싱 사용")
+            return None
+        
+        logger.info(f"📡 검색 JSON 에서 상품 {len(records)}개 추출 (DOM 카드 {len(dom_ids)}개와 대조)")
+        return records
+
+    def _card_selectors(self):
+        return self.CARD_SELECTORS["android" if self.platform == "android" else "pc"]
+
+    def _dom_product_ids(self):
+        """현재 페이지 상품 카드의 상품 ID 목록 - _find_product_cards 와 같은 선택자 순서"""
+        return self.driver.execute_script(
+            r"""
+            for (const selector of arguments[0]) {
+                const cards = document.querySelectorAll(selector);
+                if (!cards.length) continue;
+                const ids = [];
+                for (const card of cards) {
+                    let id = card.getAttribute('data-product-id');
+                    const link = card.querySelector('a[href]');
+                    const match = link && link.getAttribute('href').match(/\/products\/(\d+)/);
+                    if (!id && match) id = match[1];
+                    if (id) ids.push(id);
+                }
+                return ids;
+            }
+            return [];
+            """,
+            list(self._card_selectors())
+        ) or []
+
+    def rank_serp(self, serp, kw, page, prod, item, vend, capture=None):
+        """fetch 결과에서 대상 상품 순위 계산 (드라이버 불필요) - JSON 레코드 우선, 없으면 DOM 파싱"""
+        if serp.get("records"):
+            if capture is not None:
+                capture.extend(serp["records"])
+            result = self._rank_records(serp["records"], kw, page, prod, item, vend)
+        else:
+            result = self._rank_html(serp["html"], kw, page, prod, item, vend, capture, screenshot=serp.get("screenshot"))
+        
+        if result:
+            logger.info(f"🎯 순위 발견!")
+            logger.info(f"   - 순위: {result['rank']}위")
+            logger.info(f"   - 페이지: {result['page']}")
+            logger.info(f"   - 상품명: {result['product']}")
+            
+            # 성공 스크린샷
+            self._take_screenshot(f"found_rank_{result['rank']}", source=serp.get("screenshot"))
+        else:
+            logger.info(f"❌ 페이지 {page}에서 대상 상품 미발견")
+        
+        return result
+
+    def capture_serp(self, serp, kw, page, capture):
+        """fetch 결과의 전체 카드를 capture 에 기록 (순위 계산 없음)"""
+        from bs4 import BeautifulSoup
+        
+        if serp.get("records"):
+            capture.extend(serp["records"])
+            return
+        
+        cards = self._find_product_cards(BeautifulSoup(serp["html"], "html.parser"), page)
+        capture.extend(self._card_records(cards, kw, page))
+
+    def _rank_html(self, html, kw, page, prod, item, vend, capture=None, screenshot=None):
+        """검색 결과 HTML 에서 순위 계산 (DOM 파싱)"""
+        from bs4 import BeautifulSoup
+        
+        # HTML 파싱
+        soup = BeautifulSoup(html, "html.parser")
+        
+        # 상품 카드 찾기
+        cards = self._find_product_cards(soup, page)
+        
+        if not cards:
+            logger.warning(f"❌ 페이지 {page}에서 상품 카드를 찾지 못함")
+            
+            # 디버깅 정보 수집
+            page_text = soup.get_text()
+            logger.info(f"📝 페이지 텍스트 길이: {len(page_text)}")
+            
+            # 키워드가 페이지에 있는지 확인
+            if kw.lower() in page_text.lower():
+                logger.info(f"✅ 키워드 '{kw}' 페이지에서 발견됨")
+            else:
+                logger.warning(f"❌ 키워드 '{kw}' 페이지에서 발견되지 않음")
+            
+            # 페이지 샘플 텍스트 로깅
+            sample_text = page_text[:1000].replace('\n', ' ').strip()
+            logger.info(f"📄 페이지 내용 샘플: {sample_text}")
+            
+            # 스크린샷 저장
+            self._take_screenshot(f"no_products_page_{page}", source=screenshot)
+            return None
+        
+        # 전체 카드 기록
+        if capture is not None:
+            capture.extend(self._card_records(cards, kw, page))
+        
+        return self._calculate_rank(cards, kw, page, prod, item, vend)
+
+    def rank(self, kw, tgt_url, pages=5, capture=None, raise_errors=False):
+        """개선된 순위 검색 - 디버깅 강화 버전
+        
+        페이지 로드(이 스레드)와 파싱/순위 계산(프로세스 풀)을 파이프라인으로 분리해,
+        이전 페이지를 파싱하는 동안 드라이버는 다음 페이지를 로드한다.
+        대상 상품을 찾으면 남은 페이지 요청은 취소된다.
+        
+        capture(SerpCapture 등 add/extend 가능한 객체)를 넘기면 모든 카드를 기록하며,
+        대상 상품을 찾아도 멈추지 않고 pages 까지 계속 수집한다.
+        
+        드라이버 생성 실패, 모든 페이지 로드 실패, 크롤링 중 오류는 기본적으로 None(미노출)과
+        구분되지 않는다. raise_errors=True 면 이 경우 CrawlError 를 발생시킨다.
+        """
         logger.info("="*60)
         logger.info(f"🚀 크롤링 시작")
         logger.info(f"   - 키워드: {kw}")
         logger.info(f"   - 플랫폼: {self.platform}")
         logger.info(f"   - 대상 URL: {tgt_url}")
         logger.info(f"   - 검색 페이지: {pages}")
+        logger.info(f"   - 추출 방식: {self.extract}")
+        logger.info(f"   - 전체 SERP 수집: {capture is not None}")
         logger.info("="*60)
         
         if not self._build():
             logger.error("❌ 드라이버 빌드 실패")
+            if raise_errors:
+                raise CrawlError("드라이버 빌드 실패")
             return None
         
+        self.cancelled.clear()
+        found = None
+        error = None
+        
         try:
             # URL에서 ID 추출
-            prod, item, vend = self._ids(tgt_url)
+            ids = self._ids(tgt_url)
             logger.info(f"🆔 추출된 ID:")
-            logger.info(f"   - Product ID: {prod}")
-            logger.info(f"   - Item ID: {item}")
-            logger.info(f"   - Vendor Item ID: {vend}")
-            
-            # 검색 URL 베이스 설정
-            if self.platform == "android":
-                base = "https://m.coupang.com/nm/search?q="
-                logger.info("📱 모바일 검색 모드")
-            else:
-                base = "https://www.coupang.com/np/search?q="
-                logger.info("💻 PC 검색 모드")
+            logger.info(f"   - Product ID: {ids[0]}")
+            logger.info(f"   - Item ID: {ids[1]}")
+            logger.info(f"   - Vendor Item ID: {ids[2]}")
+            logger.info("📱 모바일 검색 모드" if self.platform == "android" else "💻 PC 검색 모드")
             
-            # 페이지별 검색
-            for p in range(1, pages + 1):
-                logger.info(f"\n📄 페이지 {p}/{pages} 검색 시작")
-                logger.info("-" * 40)
-                
-                url = f"{base}{urllib.parse.quote(kw)}&page={p}"
-                logger.info(f"🔗 검색 URL: {url}")
-                
-                if not self._load(url):
-                    logger.warning(f"⚠️ 페이지 {p} 로드 실패 - 다음 페이지로 이동")
-                    continue
-                
-                # HTML 파싱
-                soup = BeautifulSoup(self.driver.page_source, "html.parser")
-                
-                # 상품 카드 찾기
-                cards = self._find_product_cards(soup, p)
-                
-                if not cards:
-                    logger.warning(f"❌ 페이지 {p}에서 상품 카드를 찾지 못함")
-                    
-                    # 디버깅 정보 수집
-                    page_text = soup.get_text()
-                    logger.info(f"📝 페이지 텍스트 길이: {len(page_text)}")
-                    
-                    # 키워드가 페이지에 있는지 확인
-                    if kw.lower() in page_text.lower():
-                        logger.info(f"✅ 키워드 '{kw}' 페이지에서 발견됨")
-                    else:
-                        logger.warning(f"❌ 키워드 '{kw}' 페이지에서 발견되지 않음")
-                    
-                    # 페이지 샘플 텍스트 로깅
-                    sample_text = page_text[:1000].replace('\n', ' ').strip()
-                    logger.info(f"📄 페이지 내용 샘플: {sample_text}")
-                    
-                    # 스크린샷 저장
-                    self._take_screenshot(f"no_products_page_{p}")
-                    continue
-                
-                # 순위 계산
-                result = self._calculate_rank(cards, kw, p, prod, item, vend)
-                if result:
-                    logger.info(f"🎯 순위 발견!")
-                    logger.info(f"   - 순위: {result['rank']}위")
-                    logger.info(f"   - 페이지: {result['page']}")
-                    logger.info(f"   - 상품명: {result['product']}")
-                    
-                    # 성공 스크린샷
-                    self._take_screenshot(f"found_rank_{result['rank']}")
-                    
-                    self.driver.quit()
-                    return result
-                else:
-                    logger.info(f"❌ 페이지 {p}에서 대상 상품 미발견")
+            found, loaded, failure = rank_pages(
+                lambda p: self.fetch(kw, p), self.platform, kw, ids, pages, capture, self.cancelled
+            )
+            if failure is not None:
+                raise failure
             
-            logger.info("🔍 모든 페이지 검색 완료 - 대상 상품을 찾지 못함")
-            self.driver.quit()
-            return None
+            if not loaded and not self.cancelled.is_set():
+                error = CrawlError("모든 페이지 로드 실패")
             
         except Exception as e:
             logger.error(f"💥 크롤링 중 치명적 오류: {e}")
@@ -293,33 +885,28 @@ class CoupangCrawler:
             
             # 오류 스크린샷
             self._take_screenshot("error_occurred")
+            error = CrawlError(f"크롤링 중 오류: {e}")
+            error.__cause__ = e
             
-            if self.driver:
-                self.driver.quit()
+        finally:
+            self._quit()
+        
+        if found:
+            return found
+        if error is not None:
+            logger.error(f"❌ 크롤링 실패: {error}")
+            if raise_errors:
+                raise error
             return None
+        
+        logger.info("🔍 모든 페이지 검색 완료 - 대상 상품을 찾지 못함")
+        return None
 
     def _find_product_cards(self, soup, page_num):
         """플랫폼별 상품 카드 찾기 - 디버깅 강화"""
         logger.info(f"🔍 페이지 {page_num}에서 상품 카드 검색 중...")
         
-        if self.platform == "android":
-            selectors = [
-                "li.plp-default__item",
-                ".search-product-item",
-                "[data-product-id]",
-                ".product-item"
-            ]
-        else:
-            selectors = [
-                "li.ProductUnit_productUnit__Qd6sv",
-                "dl[data-product-id]",
-                "li.search-product",
-                "div.search-product",
-                "li[data-product-id]",
-                "div[data-product-id]",
-                ".search-product-wrap",
-                ".product-item"
-            ]
+        selectors = self._card_selectors()
         
         for i, selector in enumerate(selectors):
             logger.info(f"🎯 선택자 {i+1}/{len(selectors)} 시도: {selector}")
@@ -351,18 +938,7 @@ class CoupangCrawler:
             logger.info(f"🔍 카드 {card_num}/{len(cards)} 분석 중...")
             
             # 광고 필터링
-            ad_indicators = [
-                "span.ad-badge", 
-                "div.AdMark_adMark__KPMsC",
-                ".ad-product",
-                "[data-ad-id]",
-                ".sponsored",
-                ".ad-label",
-                "[data-impression-id]"
-            ]
-            
-            is_ad = any(c.select_one(indicator) for indicator in ad_indicators)
-            if is_ad:
+            if self._is_ad(c):
                 ad_count += 1
                 logger.info(f"   📢 광고 상품 - 순위에서 제외 (광고 {ad_count}개)")
                 continue
@@ -397,6 +973,71 @@ class CoupangCrawler:
         logger.info(f"📊 페이지 {page} 분석 완료 - 총 {idx}개 일반 상품, {ad_count}개 광고 상품")
         return None
 
+    def _is_ad(self, card):
+        """광고 카드 여부"""
+        ad_indicators = [
+            "span.ad-badge", 
+            "div.AdMark_adMark__KPMsC",
+            ".ad-product",
+            "[data-ad-id]",
+            ".sponsored",
+            ".ad-label",
+            "[data-impression-id]"
+        ]
+        
+        return any(card.select_one(indicator) for indicator in ad_indicators)
+
+    def _card_records(self, cards, kw, page):
+        """페이지의 모든 카드(광고 포함)를 레코드로 변환 - 전체 SERP 수집용"""
+        records = []
+        now = datetime.now()
+        idx = 0
+        
+        for position, c in enumerate(cards, 1):
+            is_ad = self._is_ad(c)
+            if not is_ad:
+                idx += 1
+            
+            ids = self._extract_product_ids(c)
+            records.append({
+                "time": now,
+                "keyword": kw,
+                "platform": self.platform,
+                "page": page,
+                "position": position,
+                "rank": None if is_ad else idx,
+                "is_ad": is_ad,
+                "product_id": ids['product_id'],
+                "item_id": ids['item_id'],
+                "vendor_id": ids['vendor_id'],
+                "product": self._extract_product_name(c)
+            })
+        
+        logger.info(f"🗂️ 페이지 {page} 전체 카드 {len(records)}개 수집")
+        return records
+
+    def _rank_records(self, records, kw, page, prod, item, vend):
+        """카드 레코드(JSON 추출)에서 순위 계산"""
+        logger.info(f"🧮 순위 계산 시작 - {len(records)}개 레코드 분석")
+        
+        for record in records:
+            if record['is_ad'] or not self._is_match(record, prod, item, vend):
+                continue
+            
+            logger.info(f"   🎯 대상 상품 매칭 성공! (순위 {record['rank']})")
+            return {
+                "keyword": kw,
+                "platform": self.platform,
+                "rank": record['rank'],
+                "page": page,
+                "product": record['product'],
+                "time": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            }
+        
+        ads = sum(1 for record in records if record['is_ad'])
+        logger.info(f"📊 페이지 {page} 분석 완료 - 총 {len(records) - ads}개 일반 상품, {ads}개 광고 상품")
+        return None
+
     def _extract_product_ids(self, card):
         """상품 ID들 추출"""
         ids = {
@@ -483,8 +1124,8 @@ class CoupangCrawler:
         return prod, item_id, vendor_item_id
 
     def __del__(self):
-        if hasattr(self, 'driver') and self.driver:
+        if hasattr(self, 'driver'):
             try:
-                self.driver.quit()
+                self._quit()
             except:
                 pass
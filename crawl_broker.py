@@ -0,0 +1,176 @@
+# crawl_broker.py - 여러 Streamlit 세션이 공유하는 프로세스 전역 크롤링 브로커
+import time
+import atexit
+import threading
+import logging
+from concurrent.futures import Future
+
+from coupang_crawler import CoupangCrawler, get_driver_factory, rank_pages
+
+logger = logging.getLogger(__name__)
+
+
+class CrawlBroker:
+    """세션 간 검색 페이지 요청을 합치고 호스트 전체 브라우저 수를 제한
+
+    - 같은 (키워드, 플랫폼, 페이지, 시크릿, 추출 방식) 요청이 진행 중이면 새로 띄우지 않고 결과를 기다린다 (single-flight)
+    - 가져온 페이지는 기다리던 모든 세션에 전달되고, 대상 상품 매칭은 각 세션에서 파싱 풀로 수행
+    - 브라우저는 (플랫폼, 헤드리스, 시크릿, 추출 방식) 별로 재사용하며 전체 수는 max_browsers 이하
+    - 시크릿 모드 브라우저는 같은 키워드 검색 안에서만 재사용하고 검색이 끝나면 종료 (검색 간 격리)
+    - idle_seconds 동안 쓰이지 않은 브라우저는 종료해 프로필 슬롯/프록시를 반환
+    """
+
+    def __init__(self, max_browsers=2, factory=None, profiles=None, proxies=None, idle_seconds=120):
+        self.max_browsers = max_browsers
+        self.factory = factory or get_driver_factory()
+        self.profiles = profiles
+        self.proxies = proxies
+        self.idle_seconds = idle_seconds
+        self._lock = threading.Lock()
+        self._slot_free = threading.Condition(self._lock)
+        self._inflight = {}
+        self._idle = {}
+        self._live = 0
+        self._closed = threading.Event()
+
+        self._reaper = threading.Thread(target=self._reap_loop, daemon=True)
+        self._reaper.start()
+        atexit.register(self.close)
+
+    def fetch(self, kw, platform, page, headless=True, delay=8, incog=True, extract="dom"):
+        """CoupangCrawler.fetch 결과 반환 (실패 시 None) - 동일 요청은 한 번만 크롤링"""
+        # 추출 방식이 다르면 결과(records 유무)가 다르고, 시크릿 여부에 따라 쿠키가 달라 합치지 않음
+        key = (kw, platform, page, incog, extract)
+
+        with self._lock:
+            future = self._inflight.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._inflight[key] = future
+
+        if not leader:
+            logger.info(f"🤝 진행 중인 요청에 합류: {platform.upper()} - {kw} ({page}페이지)")
+            return future.result()
+
+        serp = None
+        try:
+            serp = self._crawl(kw, platform, page, headless, delay, incog, extract)
+        finally:
+            with self._lock:
+                del self._inflight[key]
+            future.set_result(serp)
+        return serp
+
+    def rank(self, kw, tgt_url, platform, pages=5, headless=True, delay=8, incog=True, extract="dom", capture=None):
+        """CoupangCrawler.rank 와 같은 결과를 브로커를 통해 계산
+
+        페이지는 브로커로 가져오고 파싱/순위 계산은 CoupangCrawler.rank 와 같은 파이프라인(rank_pages)으로
+        처리한다. 대상 상품을 찾으면 남은 페이지는 요청하지 않는다 (capture 가 없을 때).
+        """
+        def fetch(page):
+            return self.fetch(kw, platform, page, headless=headless, delay=delay, incog=incog, extract=extract)
+
+        try:
+            found, _, error = rank_pages(fetch, platform, kw, CoupangCrawler._ids(tgt_url), pages, capture)
+        finally:
+            if incog:
+                # 검색이 끝난 시크릿 브라우저는 재사용하지 않음
+                self._retire(self._pool_key(kw, platform, headless, incog, extract))
+
+        if error is not None and not found:
+            raise error
+        return found
+
+    def close(self):
+        """대기 중인 브라우저 모두 종료 - 프로세스 종료 시 자동 호출"""
+        self._closed.set()
+        self._close_idle(lambda key, last_used: True)
+
+    @staticmethod
+    def _pool_key(kw, platform, headless, incog, extract):
+        # 시크릿 모드는 키워드(검색) 단위로만 브라우저를 공유
+        return (platform, headless, incog, extract, kw if incog else None)
+
+    def _retire(self, key):
+        self._close_idle(lambda idle_key, last_used: idle_key == key)
+
+    def _reap_loop(self):
+        while not self._closed.wait(min(self.idle_seconds, 30)):
+            deadline = time.time() - self.idle_seconds
+            self._close_idle(lambda key, last_used: last_used < deadline)
+
+    def _close_idle(self, should_close):
+        """조건에 맞는 유휴 브라우저 종료"""
+        closing = []
+        with self._lock:
+            for key, idle in self._idle.items():
+                keep = []
+                for crawler, last_used in idle:
+                    if should_close(key, last_used):
+                        closing.append(crawler)
+                    else:
+                        keep.append((crawler, last_used))
+                idle[:] = keep
+            self._live -= len(closing)
+            self._slot_free.notify_all()
+
+        for crawler in closing:
+            crawler._quit()
+        if closing:
+            logger.info(f"🧹 유휴 브라우저 {len(closing)}개 종료")
+
+    def _crawl(self, kw, platform, page, headless, delay, incog, extract):
+        key = self._pool_key(kw, platform, headless, incog, extract)
+        crawler = self._checkout(key)
+        try:
+            crawler.delay = delay
+            return crawler.fetch(kw, page)
+        finally:
+            self._checkin(key, crawler)
+
+    def _checkout(self, key):
+        """재사용 가능한 크롤러를 꺼내거나, 슬롯이 있으면 새로 생성"""
+        victim = None
+        with self._lock:
+            while True:
+                idle = self._idle.get(key)
+                if idle:
+                    return idle.pop()[0]
+                if self._live < self.max_browsers:
+                    self._live += 1
+                    break
+                # 가장 오래 쉰 다른 설정의 유휴 브라우저를 닫고 슬롯을 넘겨받음
+                candidates = [idle for idle in self._idle.values() if idle]
+                if candidates:
+                    oldest = min(candidates, key=lambda idle: idle[0][1])
+                    victim = oldest.pop(0)[0]
+                    break
+                self._slot_free.wait()
+
+        if victim:
+            victim._quit()
+
+        platform, headless, incog, extract, _ = key
+        logger.info(f"🧭 브로커 브라우저 추가: {platform.upper()} (최대 {self.max_browsers}개)")
+        return CoupangCrawler(
+            platform=platform,
+            headless=headless,
+            incog=incog,
+            factory=self.factory,
+            profiles=None if incog else self.profiles,
+            extract=extract,
+            proxies=self.proxies
+        )
+
+    def _checkin(self, key, crawler):
+        with self._lock:
+            closed = self._closed.is_set()
+            if closed:
+                self._live -= 1
+            else:
+                self._idle.setdefault(key, []).append((crawler, time.time()))
+            self._slot_free.notify()
+
+        if closed:
+            crawler._quit()
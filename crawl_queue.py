@@ -0,0 +1,227 @@
+# crawl_queue.py - 여러 노드가 공유하는 크롤링 작업 큐 (키워드 × 플랫폼 × 대상 상품)
+import json
+import time
+import sqlite3
+import logging
+from abc import ABC, abstractmethod
+
+logger = logging.getLogger(__name__)
+
+
+class TaskQueue(ABC):
+    """작업 큐 인터페이스 - 백엔드(SQLite, Redis 등)는 이 메서드들을 구현
+
+    작업(dict): id, keyword, platform, target_url, pages, options, status, attempts, result, error
+    """
+
+    @abstractmethod
+    def put(self, keyword, platform, target_url, pages=5, options=None):
+        """작업 등록 - 작업 id 반환"""
+
+    def put_many(self, keywords, platforms, target_url, pages=5, options=None):
+        """키워드 × 플랫폼 작업 일괄 등록 - 작업 id 목록 반환 (백엔드가 더 효율적으로 재정의 가능)"""
+        return [
+            self.put(keyword, platform, target_url, pages, options)
+            for keyword in keywords
+            for platform in platforms
+        ]
+
+    @abstractmethod
+    def lease(self, worker_id, lease_seconds=300):
+        """대기 중이거나 임대가 만료된 작업 하나를 worker_id 에게 임대 (없으면 None)"""
+
+    @abstractmethod
+    def heartbeat(self, task_id, worker_id, lease_seconds=300):
+        """임대 연장 - 아직 이 워커가 임대 중일 때만 True"""
+
+    @abstractmethod
+    def complete(self, task_id, worker_id, result):
+        """결과 제출 - 아직 이 워커가 임대 중일 때만 True"""
+
+    @abstractmethod
+    def fail(self, task_id, worker_id, error):
+        """실패 보고 - max_attempts 전이면 다시 대기 상태, 아니면 실패 확정"""
+
+    @abstractmethod
+    def results(self):
+        """완료/실패한 작업 목록"""
+
+    @abstractmethod
+    def counts(self):
+        """상태별 작업 수 {status: n}"""
+
+
+class SQLiteTaskQueue(TaskQueue):
+    """SQLite 파일 기반 작업 큐 - 한 호스트 전용 (개발·테스트, 단일 머신의 여러 워커 프로세스)
+
+    WAL 모드는 네트워크 파일시스템(NFS/SMB)에서 동작하지 않으므로 DB 파일을 여러 노드가
+    공유해서는 안 된다. 여러 노드는 네트워크 백엔드를 QUEUE_BACKENDS 에 등록해 사용한다.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS tasks (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            keyword TEXT NOT NULL,
+            platform TEXT NOT NULL,
+            target_url TEXT NOT NULL,
+            pages INTEGER NOT NULL,
+            options TEXT NOT NULL,
+            status TEXT NOT NULL DEFAULT 'pending',
+            attempts INTEGER NOT NULL DEFAULT 0,
+            worker_id TEXT,
+            lease_until REAL,
+            result TEXT,
+            error TEXT,
+            updated_at REAL NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS tasks_status ON tasks (status, lease_until);
+    """
+
+    def __init__(self, path, max_attempts=3):
+        self.path = path
+        self.max_attempts = max_attempts
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(self.SCHEMA)
+
+    def _connect(self):
+        # 호출마다 연결 - 스레드/프로세스 간 공유 문제 없음
+        return _Connection(self.path)
+
+    def put(self, keyword, platform, target_url, pages=5, options=None):
+        with self._connect() as conn:
+            cur = conn.execute(
+                "INSERT INTO tasks (keyword, platform, target_url, pages, options, updated_at) VALUES (?, ?, ?, ?, ?, ?)",
+                (keyword, platform, target_url, pages, json.dumps(options or {}), time.time())
+            )
+            return cur.lastrowid
+
+    def put_many(self, keywords, platforms, target_url, pages=5, options=None):
+        # 한 트랜잭션으로 등록
+        now = time.time()
+        options = json.dumps(options or {})
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            return [
+                conn.execute(
+                    "INSERT INTO tasks (keyword, platform, target_url, pages, options, updated_at) VALUES (?, ?, ?, ?, ?, ?)",
+                    (keyword, platform, target_url, pages, options, now)
+                ).lastrowid
+                for keyword in keywords
+                for platform in platforms
+            ]
+
+    def lease(self, worker_id, lease_seconds=300):
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+
+            # 임대 만료 + 재시도 소진 작업은 실패 처리
+            conn.execute(
+                "UPDATE tasks SET status = 'failed', error = 'lease expired', updated_at = ? "
+                "WHERE status = 'leased' AND lease_until < ? AND attempts >= ?",
+                (now, now, self.max_attempts)
+            )
+
+            row = conn.execute(
+                "SELECT * FROM tasks WHERE status = 'pending' OR (status = 'leased' AND lease_until < ?) "
+                "ORDER BY id LIMIT 1",
+                (now,)
+            ).fetchone()
+            if row is None:
+                return None
+
+            conn.execute(
+                "UPDATE tasks SET status = 'leased', worker_id = ?, lease_until = ?, attempts = attempts + 1, updated_at = ? "
+                "WHERE id = ?",
+                (worker_id, now + lease_seconds, now, row["id"])
+            )
+            row = conn.execute("SELECT * FROM tasks WHERE id = ?", (row["id"],)).fetchone()
+
+        task = self._task(row)
+        logger.info(f"📥 작업 {task['id']} 임대: {task['platform'].upper()} - {task['keyword']} ({worker_id})")
+        return task
+
+    def heartbeat(self, task_id, worker_id, lease_seconds=300):
+        now = time.time()
+        with self._connect() as conn:
+            cur = conn.execute(
+                "UPDATE tasks SET lease_until = ?, updated_at = ? WHERE id = ? AND worker_id = ? AND status = 'leased'",
+                (now + lease_seconds, now, task_id, worker_id)
+            )
+            return cur.rowcount == 1
+
+    def complete(self, task_id, worker_id, result):
+        with self._connect() as conn:
+            cur = conn.execute(
+                "UPDATE tasks SET status = 'done', result = ?, error = NULL, lease_until = NULL, updated_at = ? "
+                "WHERE id = ? AND worker_id = ? AND status = 'leased'",
+                (json.dumps(result, ensure_ascii=False), time.time(), task_id, worker_id)
+            )
+            return cur.rowcount == 1
+
+    def fail(self, task_id, worker_id, error):
+        with self._connect() as conn:
+            cur = conn.execute(
+                "UPDATE tasks SET status = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END, "
+                "error = ?, lease_until = NULL, updated_at = ? "
+                "WHERE id = ? AND worker_id = ? AND status = 'leased'",
+                (self.max_attempts, str(error), time.time(), task_id, worker_id)
+            )
+            return cur.rowcount == 1
+
+    def results(self):
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT * FROM tasks WHERE status IN ('done', 'failed') ORDER BY id"
+            ).fetchall()
+        return [self._task(row) for row in rows]
+
+    def counts(self):
+        with self._connect() as conn:
+            rows = conn.execute("SELECT status, COUNT(*) AS n FROM tasks GROUP BY status").fetchall()
+        return {row["status"]: row["n"] for row in rows}
+
+    @staticmethod
+    def _task(row):
+        task = dict(row)
+        task["options"] = json.loads(task["options"])
+        task["result"] = json.loads(task["result"]) if task["result"] is not None else None
+        return task
+
+
+# 큐 URL 스킴 → 백엔드 생성 함수
+# sqlite: "sqlite:///queue.db" (상대 경로), "sqlite:////var/lib/crawl/queue.db" (절대 경로)
+QUEUE_BACKENDS = {
+    "sqlite": lambda location, **kwargs: SQLiteTaskQueue(location, **kwargs),
+}
+
+
+def open_queue(url, **kwargs):
+    """큐 URL 로 백엔드 선택 - 스킴이 없으면 SQLite 파일 경로로 간주"""
+    scheme, sep, location = url.partition("://")
+    if not sep:
+        return SQLiteTaskQueue(url, **kwargs)
+    if scheme not in QUEUE_BACKENDS:
+        raise ValueError(f"지원하지 않는 큐 백엔드: {scheme} (사용 가능: {', '.join(QUEUE_BACKENDS)})")
+    if scheme == "sqlite" and location.startswith("/"):
+        location = location[1:]
+    return QUEUE_BACKENDS[scheme](location, **kwargs)
+
+
+class _Connection:
+    """autocommit sqlite 연결 - with 블록에서 열린 트랜잭션은 커밋, 예외 시 롤백"""
+
+    def __init__(self, path):
+        self.conn = sqlite3.connect(path, timeout=30, isolation_level=None)
+        self.conn.row_factory = sqlite3.Row
+
+    def __enter__(self):
+        return self.conn
+
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            if self.conn.in_transaction:
+                self.conn.execute("ROLLBACK" if exc_type else "COMMIT")
+        finally:
+            self.conn.close()
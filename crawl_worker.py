@@ -0,0 +1,146 @@
+# crawl_worker.py - 작업 큐에서 크롤링 작업을 가져와 실행하는 워커
+#
+# 실행 예: python crawl_worker.py --queue sqlite:///crawl_queue.db
+# 작업 등록: python crawl_worker.py --queue sqlite:///crawl_queue.db enqueue --target-url <상품 URL> -p pc -p android 수건 타올
+# 노드를 늘릴 때는 같은 큐를 바라보는 워커를 더 띄우기만 하면 된다.
+# (SQLite 백엔드는 한 호스트 전용 - 여러 노드는 네트워크 큐 백엔드 URL 을 지정)
+import os
+import time
+import socket
+import argparse
+import threading
+import logging
+
+from coupang_crawler import CoupangCrawler, get_driver_factory
+from crawl_queue import open_queue
+from proxy_pool import ProxyPool
+
+logger = logging.getLogger(__name__)
+
+
+class CrawlWorker:
+    """큐에서 작업을 임대해 CoupangCrawler.rank 를 실행하고 결과 제출
+
+    heartbeat_seconds 를 지정하지 않으면 lease_seconds 의 1/3 마다 임대를 연장한다.
+    """
+
+    def __init__(self, queue, worker_id=None, lease_seconds=300, heartbeat_seconds=None, factory=None, profiles=None, proxies=None):
+        if heartbeat_seconds is None:
+            heartbeat_seconds = lease_seconds / 3
+        if heartbeat_seconds >= lease_seconds:
+            raise ValueError(f"heartbeat_seconds({heartbeat_seconds}) 는 lease_seconds({lease_seconds}) 보다 짧아야 함")
+        
+        self.queue = queue
+        self.worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}"
+        self.lease_seconds = lease_seconds
+        self.heartbeat_seconds = heartbeat_seconds
+        self.factory = factory or get_driver_factory()
+        self.profiles = profiles
+        self.proxies = proxies
+
+    def run_once(self):
+        """작업 하나 처리 - 처리할 작업이 없으면 False"""
+        task = self.queue.lease(self.worker_id, self.lease_seconds)
+        if task is None:
+            return False
+
+        done = threading.Event()
+        heartbeat = threading.Thread(target=self._heartbeat, args=(task["id"], done), daemon=True)
+        heartbeat.start()
+
+        try:
+            options = task["options"]
+            incog = options.get("incog", True)
+            crawler = CoupangCrawler(
+                platform=task["platform"],
+                headless=options.get("headless", True),
+                delay=options.get("delay", 8),
+                incog=incog,
+                extract=options.get("extract", "dom"),
+                factory=self.factory,
+                profiles=None if incog else self.profiles,
+                proxies=self.proxies
+            )
+            result = crawler.rank(task["keyword"], task["target_url"], task["pages"], raise_errors=True)
+        except Exception as e:
+            logger.error(f"❌ 작업 {task['id']} 실패: {e}")
+            self.queue.fail(task["id"], self.worker_id, e)
+            return True
+        finally:
+            done.set()
+            heartbeat.join()
+
+        if not self.queue.complete(task["id"], self.worker_id, result):
+            logger.warning(f"⚠️ 작업 {task['id']} 결과 제출 실패 - 임대가 만료되어 다른 워커에 넘어감")
+        else:
+            logger.info(f"📤 작업 {task['id']} 완료: {result['rank'] if result else '미노출'}")
+        return True
+
+    def run(self, idle_sleep=5, stop_event=None):
+        """stop_event 가 설정될 때까지 작업 처리"""
+        logger.info(f"👷 워커 시작: {self.worker_id}")
+        while not (stop_event and stop_event.is_set()):
+            if not self.run_once():
+                time.sleep(idle_sleep)
+        logger.info(f"👷 워커 종료: {self.worker_id}")
+
+    def _heartbeat(self, task_id, done):
+        while not done.wait(self.heartbeat_seconds):
+            if not self.queue.heartbeat(task_id, self.worker_id, self.lease_seconds):
+                logger.warning(f"⚠️ 작업 {task_id} 임대 연장 실패")
+                return
+
+
+def enqueue(queue, args):
+    """키워드 × 플랫폼 작업 등록"""
+    keywords = list(args.keywords)
+    if args.keywords_file:
+        with open(args.keywords_file, encoding="utf-8") as f:
+            keywords += [line.strip() for line in f if line.strip()]
+    if not keywords:
+        raise SystemExit("등록할 키워드가 없음")
+
+    options = {"delay": args.delay, "extract": args.extract, "incog": not args.keep_profile}
+    task_ids = queue.put_many(keywords, args.platform or ["pc"], args.target_url, args.pages, options)
+    logger.info(f"📝 작업 {len(task_ids)}개 등록 (키워드 {len(keywords)}개 × 플랫폼 {len(args.platform or ['pc'])}개)")
+    return task_ids
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="쿠팡 순위 크롤링 워커")
+    parser.add_argument("--queue", default="sqlite:///crawl_queue.db", help="작업 큐 URL (예: sqlite:///crawl_queue.db)")
+    parser.add_argument("--worker-id", default=None)
+    parser.add_argument("--lease", type=int, default=300, help="작업 임대 시간 (초) - 임대 연장은 1/3 마다")
+    parser.add_argument("--once", action="store_true", help="작업 하나만 처리하고 종료")
+
+    commands = parser.add_subparsers(dest="command")
+    enqueue_parser = commands.add_parser("enqueue", help="키워드 × 플랫폼 작업 등록 (워커는 실행하지 않음)")
+    enqueue_parser.add_argument("keywords", nargs="*", help="검색 키워드")
+    enqueue_parser.add_argument("--keywords-file", help="한 줄에 키워드 하나인 파일")
+    enqueue_parser.add_argument("--target-url", required=True, help="순위를 찾을 상품 URL")
+    enqueue_parser.add_argument("-p", "--platform", action="append", choices=["pc", "android"], help="검색 플랫폼 (반복 가능, 기본 pc)")
+    enqueue_parser.add_argument("--pages", type=int, default=5)
+    enqueue_parser.add_argument("--delay", type=int, default=8)
+    enqueue_parser.add_argument("--extract", choices=["dom", "network"], default="dom")
+    enqueue_parser.add_argument("--keep-profile", action="store_true", help="시크릿 모드 대신 영구 프로필 사용")
+    args = parser.parse_args(argv)
+
+    queue = open_queue(args.queue)
+    if args.command == "enqueue":
+        enqueue(queue, args)
+        return
+
+    worker = CrawlWorker(
+        queue,
+        worker_id=args.worker_id,
+        lease_seconds=args.lease,
+        proxies=ProxyPool.from_env()
+    )
+    if args.once:
+        worker.run_once()
+    else:
+        worker.run()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+# network_capture.py - 브라우저 네트워크 로그에서 검색 결과 JSON 추출
+import re
+import json
+import base64
+import logging
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+# 검색 결과 JSON 을 싣고 오는 요청 후보
+SEARCH_RESPONSE_PATTERN = re.compile(r"coupang\.com/.*search", re.IGNORECASE)
+
+# 상품 객체에서 사용하는 키 후보 (앞쪽 우선)
+PRODUCT_ID_KEYS = ("productId", "product_id")
+ITEM_ID_KEYS = ("itemId", "item_id")
+VENDOR_ID_KEYS = ("vendorItemId", "vendor_item_id")
+NAME_KEYS = ("productName", "itemName", "title", "name")
+AD_KEYS = ("isAd", "adFlag", "isSponsored", "sponsored", "ad", "adType", "adId")
+
+
+def enable_network_logging(options):
+    """Chrome performance 로그(Network 이벤트) 수집 활성화"""
+    options.set_capability("goog:loggingPrefs", {"performance": "ALL"})
+    options.add_experimental_option("perfLoggingPrefs", {"enableNetwork": True, "enablePage": False})
+
+
+def drain(driver):
+    """쌓여 있는 performance 로그 비우기 - 페이지 이동 전에 호출"""
+    try:
+        driver.get_log("performance")
+    except Exception as e:
+        logger.warning(f"performance 로그 비우기 실패: {e}")
+
+
+def collect_json_responses(driver, pattern=SEARCH_RESPONSE_PATTERN):
+    """마지막 drain 이후 수신된 JSON 응답 본문을 (url, data) 목록으로 반환"""
+    responses = []
+
+    for entry in driver.get_log("performance"):
+        try:
+            message = json.loads(entry["message"])["message"]
+        except (KeyError, ValueError):
+            continue
+
+        if message.get("method") != "Network.responseReceived":
+            continue
+
+        params = message.get("params", {})
+        response = params.get("response", {})
+        url = response.get("url", "")
+        if "json" not in response.get("mimeType", "") or not pattern.search(url):
+            continue
+
+        try:
+            body = driver.execute_cdp_cmd("Network.getResponseBody", {"requestId": params["requestId"]})
+            text = body["body"]
+            if body.get("base64Encoded"):
+                text = base64.b64decode(text).decode("utf-8")
+            responses.append((url, json.loads(text)))
+        except Exception as e:
+            logger.info(f"   ❌ 응답 본문 읽기 실패 ({url}): {e}")
+
+    logger.info(f"📡 검색 JSON 응답 {len(responses)}개 수집")
+    return responses
+
+
+def parse_search_payload(data, kw, platform, page):
+    """검색 JSON 에서 상품 목록을 찾아 카드 레코드로 변환 (없으면 빈 목록)
+
+    스키마가 바뀌어도 동작하도록, 상품 ID 를 가진 객체가 가장 많이 들어 있는 리스트를 상품 목록으로 본다.
+    """
+    products = max(_product_lists(data), key=len, default=[])
+    return _records(products, kw, platform, page)
+
+
+def payload_candidates(data, kw, platform, page):
+    """검색 JSON 안의 상품 목록 후보 각각을 카드 레코드 목록으로 변환"""
+    return [_records(products, kw, platform, page) for products in _product_lists(data)]
+
+
+def select_search_records(candidates, dom_ids, min_overlap=0.5):
+    """후보 레코드 목록 중 DOM 카드의 상품 ID 와 가장 많이 겹치는 목록 선택 - 검증 실패 시 None
+
+    추천/연관 상품 JSON 이 검색 결과를 대신하지 않도록, 겹치는 상품 수가 DOM 카드 수와
+    후보 목록 크기 양쪽의 min_overlap 이상일 때만 채택한다.
+    """
+    dom_ids = {str(x) for x in dom_ids if x}
+    if not dom_ids:
+        return None
+
+    best, best_ids, best_matched = None, set(), 0
+    for records in candidates:
+        ids = {record["product_id"] for record in records if record["product_id"]}
+        matched = len(ids & dom_ids)
+        if matched > best_matched:
+            best, best_ids, best_matched = records, ids, matched
+
+    if best is None or best_matched < min_overlap * max(len(dom_ids), len(best_ids)):
+        return None
+    return best
+
+
+def _records(products, kw, platform, page):
+    records = []
+    now = datetime.now()
+    idx = 0
+
+    for position, product in enumerate(products, 1):
+        is_ad = any(_truthy(product.get(key)) for key in AD_KEYS)
+        if not is_ad:
+            idx += 1
+
+        records.append({
+            "time": now,
+            "keyword": kw,
+            "platform": platform,
+            "page": page,
+            "position": position,
+            "rank": None if is_ad else idx,
+            "is_ad": is_ad,
+            "product_id": _first(product, PRODUCT_ID_KEYS),
+            "item_id": _first(product, ITEM_ID_KEYS),
+            "vendor_id": _first(product, VENDOR_ID_KEYS),
+            "product": _first(product, NAME_KEYS) or "상품명 추출 실패"
+        })
+
+    return records
+
+
+def _product_lists(node):
+    """상품 객체(dict) 들로 이루어진 리스트를 재귀적으로 찾기"""
+    if isinstance(node, dict):
+        for value in node.values():
+            yield from _product_lists(value)
+    elif isinstance(node, list):
+        products = [x for x in node if isinstance(x, dict) and _first(x, PRODUCT_ID_KEYS + VENDOR_ID_KEYS)]
+        if products:
+            yield products
+        for value in node:
+            yield from _product_lists(value)
+
+
+def _first(obj, keys):
+    for key in keys:
+        value = obj.get(key)
+        if value not in (None, ""):
+            return str(value)
+    return ""
+
+
+def _truthy(value):
+    if isinstance(value, str):
+        return value.strip().lower() not in ("", "0", "false", "n", "none", "null")
+    return bool(value)
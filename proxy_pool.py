@@ -0,0 +1,203 @@
+# proxy_pool.py - 드라이버별 egress 프록시 배정 및 상태 추적
+import os
+import time
+import select
+import socket
+import threading
+import socketserver
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class ProxyPool:
+    """설정된 프록시 목록에서 드라이버마다 프록시를 배정
+
+    - 사용 중인 드라이버 수가 적고 차단율/지연이 낮은 프록시를 우선 배정
+    - 차단(CAPTCHA)되거나 연속 실패한 프록시는 cooldown 동안 제외 (반복 시 2배씩 증가)
+    - Chrome --proxy-server 는 인증을 지원하지 않으므로 IP 허용 방식 프록시를 사용
+    """
+
+    def __init__(self, proxies, cooldown_seconds=600, max_failures=3):
+        self.cooldown_seconds = cooldown_seconds
+        self.max_failures = max_failures
+        self._lock = threading.Lock()
+        self._stats = {
+            proxy: {
+                "proxy": proxy,
+                "in_use": 0,
+                "requests": 0,
+                "failures": 0,
+                "blocks": 0,
+                "latency": None,
+                "consecutive_failures": 0,
+                "consecutive_blocks": 0,
+                "cooldown_until": 0.0,
+            }
+            for proxy in proxies
+        }
+
+    @classmethod
+    def from_env(cls, var="COUPANG_PROXIES", **kwargs):
+        """환경 변수(쉼표/줄바꿈 구분)에서 프록시 목록 로드 - 없으면 None"""
+        proxies = [p.strip() for p in os.environ.get(var, "").replace("\n", ",").split(",") if p.strip()]
+        return cls(proxies, **kwargs) if proxies else None
+
+    def __len__(self):
+        return len(self._stats)
+
+    def acquire(self):
+        """사용 가능한 프록시 중 가장 여유 있는 것을 배정 (모두 제외 상태면 None)"""
+        now = time.time()
+        with self._lock:
+            available = [s for s in self._stats.values() if s["cooldown_until"] <= now]
+            if not available:
+                logger.warning("⚠️ 사용 가능한 프록시 없음 - 모두 일시 제외 상태")
+                return None
+
+            best = min(available, key=lambda s: (s["in_use"], self._block_rate(s), s["latency"] or 0.0))
+            best["in_use"] += 1
+
+        logger.info(f"🌐 프록시 배정: {best['proxy']} (사용 중 {best['in_use']})")
+        return best["proxy"]
+
+    def release(self, proxy):
+        with self._lock:
+            stats = self._stats.get(proxy)
+            if stats and stats["in_use"] > 0:
+                stats["in_use"] -= 1
+
+    def report(self, proxy, ok, latency=None, blocked=False):
+        """요청 결과 보고 - 차단/연속 실패 시 일시 제외"""
+        with self._lock:
+            stats = self._stats.get(proxy)
+            if stats is None:
+                return
+
+            stats["requests"] += 1
+            if latency is not None:
+                # 지수 이동 평균
+                stats["latency"] = latency if stats["latency"] is None else 0.7 * stats["latency"] + 0.3 * latency
+
+            if blocked:
+                stats["blocks"] += 1
+                stats["consecutive_blocks"] += 1
+                self._cooldown(stats, f"차단 감지 {stats['consecutive_blocks']}회 연속")
+            elif not ok:
+                stats["failures"] += 1
+                stats["consecutive_failures"] += 1
+                if stats["consecutive_failures"] >= self.max_failures:
+                    self._cooldown(stats, f"{stats['consecutive_failures']}회 연속 실패")
+            else:
+                stats["consecutive_failures"] = 0
+                stats["consecutive_blocks"] = 0
+
+    def stats(self):
+        """프록시별 상태 (표시용)"""
+        now = time.time()
+        with self._lock:
+            return [
+                {
+                    "proxy": s["proxy"],
+                    "in_use": s["in_use"],
+                    "requests": s["requests"],
+                    "block_rate": round(self._block_rate(s), 3),
+                    "latency": round(s["latency"], 2) if s["latency"] is not None else None,
+                    "available": s["cooldown_until"] <= now,
+                }
+                for s in self._stats.values()
+            ]
+
+    def _cooldown(self, stats, reason):
+        streak = max(stats["consecutive_blocks"], stats["consecutive_failures"] - self.max_failures + 1, 1)
+        seconds = self.cooldown_seconds * 2 ** min(streak - 1, 5)
+        stats["cooldown_until"] = time.time() + seconds
+        logger.warning(f"🚫 프록시 일시 제외: {stats['proxy']} ({reason}, {seconds:.0f}초)")
+
+    @staticmethod
+    def _block_rate(stats):
+        return stats["blocks"] / stats["requests"] if stats["requests"] else 0.0
+
+
+class LocalForwardProxy:
+    """테스트용 로컬 포워드 프록시 (HTTP 요청 중계 + HTTPS CONNECT 터널)
+
+    with LocalForwardProxy() as proxy:
+        pool = ProxyPool([proxy.url])
+    """
+
+    def __init__(self, host="127.0.0.1", port=0):
+        proxy = self
+
+        class Handler(socketserver.BaseRequestHandler):
+            def handle(self):
+                proxy._handle(self.request)
+
+        self.requests = 0
+        self._server = socketserver.ThreadingTCPServer((host, port), Handler)
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        logger.info(f"🧪 로컬 프록시 시작: {self.url}")
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+
+    def _handle(self, client):
+        head = b""
+        while b"\r\n\r\n" not in head:
+            chunk = client.recv(65536)
+            if not chunk:
+                return
+            head += chunk
+
+        request_line = head.split(b"\r\n", 1)[0].decode("latin-1")
+        method, target, _ = request_line.split(" ", 2)
+        self.requests += 1
+
+        if method == "CONNECT":
+            host, port = target.rsplit(":", 1)
+            upstream = socket.create_connection((host, int(port)), timeout=30)
+            client.sendall(b"HTTP/1.1 200 Connection Established\r\n\r\n")
+            rest = head.split(b"\r\n\r\n", 1)[1]
+        else:
+            # 절대 URI 요청 -> 원 서버로 그대로 전달
+            without_scheme = target.split("://", 1)[-1]
+            hostport, _, path = without_scheme.partition("/")
+            host, _, port = hostport.partition(":")
+            upstream = socket.create_connection((host, int(port or 80)), timeout=30)
+            rest = head.replace(target.encode("latin-1"), b"/" + path.encode("latin-1"), 1)
+
+        with upstream:
+            if rest:
+                upstream.sendall(rest)
+            self._pipe(client, upstream)
+
+    @staticmethod
+    def _pipe(a, b):
+        sockets = [a, b]
+        while True:
+            readable, _, errored = select.select(sockets, [], sockets, 60)
+            if errored or not readable:
+                return
+            for sock in readable:
+                data = sock.recv(65536)
+                if not data:
+                    return
+                (b if sock is a else a).sendall(data)
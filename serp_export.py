@@ -0,0 +1,99 @@
+# serp_export.py - 전체 SERP 카드 수집 결과 Parquet 저장
+import logging
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+logger = logging.getLogger(__name__)
+
+# 카드 레코드 스키마
+# - keyword/platform 은 같은 값이 수만 번 반복되므로 사전(dictionary) 인코딩
+# - 상품 ID 는 숫자 문자열이라 int64 로 저장 (빈 값은 null)
+SERP_SCHEMA = pa.schema([
+    ("time", pa.timestamp("s")),
+    ("keyword", pa.dictionary(pa.int32(), pa.string())),
+    ("platform", pa.dictionary(pa.int8(), pa.string())),
+    ("page", pa.int16()),
+    ("position", pa.int16()),
+    ("rank", pa.int16()),
+    ("is_ad", pa.bool_()),
+    ("product_id", pa.int64()),
+    ("item_id", pa.int64()),
+    ("vendor_id", pa.int64()),
+    ("product", pa.string()),
+])
+
+_ID_COLUMNS = ("product_id", "item_id", "vendor_id")
+
+
+class SerpCapture:
+    """카드 레코드를 컬럼 단위 배치로 모아 Parquet 파일에 기록"""
+
+    def __init__(self, path, batch_size=10000):
+        self.path = path
+        self.batch_size = batch_size
+        self.rows = 0
+        self._writer = None
+        self._columns = {name: [] for name in SERP_SCHEMA.names}
+
+    def add(self, record):
+        """카드 레코드 1건 추가 - 배치가 차면 자동으로 기록"""
+        # 레코드 전체를 먼저 변환한 뒤 추가 (컬럼 길이가 어긋나지 않도록)
+        row = {name: record.get(name) for name in self._columns}
+        for name in _ID_COLUMNS:
+            row[name] = _to_id(row[name])
+
+        for name, column in self._columns.items():
+            column.append(row[name])
+
+        if len(self._columns["keyword"]) >= self.batch_size:
+            self.flush()
+
+    def extend(self, records):
+        for record in records:
+            self.add(record)
+
+    def flush(self):
+        """모아둔 배치를 Parquet row group 으로 기록"""
+        count = len(self._columns["keyword"])
+        if not count:
+            return
+
+        batch = pa.record_batch(
+            [pa.array(self._columns[field.name], type=field.type) for field in SERP_SCHEMA],
+            schema=SERP_SCHEMA
+        )
+
+        if self._writer is None:
+            self._writer = pq.ParquetWriter(self.path, SERP_SCHEMA, compression="zstd")
+        self._writer.write_batch(batch)
+
+        self.rows += count
+        for column in self._columns.values():
+            column.clear()
+        logger.info(f"💾 SERP 카드 {count:,}건 기록 (누적 {self.rows:,}건): {self.path}")
+
+    def close(self):
+        self.flush()
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def _to_id(value):
+    """숫자 ID 는 int, 비었거나 숫자가 아니면 None"""
+    value = str(value).strip() if value is not None else ""
+    if value.isascii() and value.isdigit() and len(value) <= 18:
+        return int(value)
+    return None
+
+
+def load_serp(path):
+    """Parquet 파일을 DataFrame 으로 로드 (keyword/platform 은 category 로 변환됨)"""
+    return pq.read_table(path).to_pandas()
@@ -1,14 +1,14 @@
 # streamlit_app.py - 실시간 로그 표시 버전
 import streamlit as st
-import pandas as pd
 import time
 import random
 import threading
 import logging
 import io
+import os
 import sys
 from datetime import datetime
-from coupang_crawler import CoupangCrawler
+import coupang_crawler
 
 # Streamlit 설정
 st.set_page_config(
@@ -17,6 +17,45 @@ st.set_page_config(
     layout="wide"
 )
 
+# 드라이버 팩토리 - 재실행(rerun)과 세션 간 공유, 드라이버 경로는 최초 1회만 확인
+@st.cache_resource
+def get_driver_factory():
+    factory = coupang_crawler.get_driver_factory()
+    factory.paths()
+    return factory
+
+# 영구 브라우저 프로필 - 세션 간 공유 (정리 스레드는 프로필을 처음 쓸 때 시작)
+@st.cache_resource
+def get_profile_manager():
+    from browser_profile import ProfileManager
+    
+    return ProfileManager()
+
+# 프록시 풀 - COUPANG_PROXIES 환경 변수 (쉼표 구분), 없으면 서버 IP 로 직접 접속
+@st.cache_resource
+def get_proxy_pool():
+    from proxy_pool import ProxyPool
+    
+    return ProxyPool.from_env()
+
+# 동시에 띄울 브라우저 수 - COUPANG_MAX_BROWSERS 환경 변수 (기본: 프록시 수, 프록시가 없으면 2)
+# 프록시를 늘려도 이 값이 동시 크롤링 수의 상한이므로, 직접 지정할 때는 프록시 수와 함께 조정
+def get_max_browsers():
+    proxies = get_proxy_pool()
+    return int(os.environ.get("COUPANG_MAX_BROWSERS") or (len(proxies) if proxies else 2))
+
+# 크롤링 브로커 - 모든 세션이 공유, 중복 요청 합치기 및 호스트 전체 브라우저 수 제한
+@st.cache_resource
+def get_crawl_broker():
+    from crawl_broker import CrawlBroker
+    
+    return CrawlBroker(
+        max_browsers=get_max_browsers(),
+        factory=get_driver_factory(),
+        profiles=get_profile_manager(),
+        proxies=get_proxy_pool()
+    )
+
 # 로그 캡처 설정
 class StreamlitLogHandler(logging.Handler):
     def __init__(self):
@@ -43,10 +82,11 @@ if 'log_handler' not in st.session_state:
     formatter = logging.Formatter('%(name)s - %(levelname)s - %(message)s')
     st.session_state.log_handler.setFormatter(formatter)
     
-    # coupang_crawler 로거에 핸들러 추가
-    crawler_logger = logging.getLogger('coupang_crawler')
-    crawler_logger.addHandler(st.session_state.log_handler)
-    crawler_logger.setLevel(logging.INFO)
+    # 크롤러 관련 로거에 핸들러 추가
+    for logger_name in ['coupang_crawler', 'crawl_broker', 'network_capture', 'proxy_pool']:
+        crawler_logger = logging.getLogger(logger_name)
+        crawler_logger.addHandler(st.session_state.log_handler)
+        crawler_logger.setLevel(logging.INFO)
 
 # 메인 UI
 st.title("🛒 쿠팡 순위 추적기")
@@ -100,8 +140,29 @@ with col2:
     # 백그라운드 실행
     headless = st.checkbox("백그라운드 실행", value=True)
     
+    # 추출 방식
+    network_extract = st.checkbox(
+        "네트워크 JSON 추출",
+        value=False,
+        help="검색 결과 JSON 응답에서 상품 정보를 바로 읽습니다. 찾지 못하면 HTML 파싱으로 대체합니다."
+    )
+    
+    # 브라우저 프로필 유지
+    keep_profile = st.checkbox(
+        "브라우저 프로필 유지 (빠른 로드)",
+        value=False,
+        help="해제 시 매번 시크릿 모드로 실행합니다. 켜면 캐시/쿠키를 재사용해 페이지 로드가 빨라집니다."
+    )
+    
     # 디버깅 옵션
     debug_mode = st.checkbox("상세 디버깅 모드", value=True)
+    
+    # 전체 SERP 수집
+    full_capture = st.checkbox(
+        "전체 SERP 수집 (Parquet)",
+        value=False,
+        help="대상 상품뿐 아니라 모든 일반/광고 카드를 기록합니다 (모든 페이지 검색)"
+    )
 
 # 실시간 로그 표시 영역
 if debug_mode:
@@ -113,12 +174,19 @@ if debug_mode:
 # 검색 실행 함수
 def run_search():
     """검색 실행 함수"""
+    import pandas as pd
+    
     keyword_list = [kw.strip() for kw in keywords.split('\n') if kw.strip()]
     platform_list = [p.lower() for p in platform_options]
     
     total_tasks = len(keyword_list) * len(platform_list)
     completed_tasks = 0
     
+    capture = None
+    if full_capture:
+        from serp_export import SerpCapture
+        capture = SerpCapture(st.session_state.serp_path)
+    
     for platform in platform_list:
         for keyword in keyword_list:
             if not st.session_state.is_running:
@@ -137,15 +205,19 @@ def run_search():
             st.session_state.log_handler.clear_logs()
             
             try:
-                # 크롤러 실행
-                crawler = CoupangCrawler(
-                    platform=platform,
+                # 브로커를 통해 크롤링 (다른 세션과 같은 페이지는 한 번만 로드)
+                result = broker.rank(
+                    keyword,
+                    url_input,
+                    platform,
+                    pages,
                     headless=headless,
-                    delay=delay
+                    delay=delay,
+                    incog=not keep_profile,
+                    extract="network" if network_extract else "dom",
+                    capture=capture
                 )
                 
-                result = crawler.rank(keyword, url_input, pages)
-                
                 # 결과 처리
                 if result:
                     st.session_state.results.append(result)
@@ -178,6 +250,9 @@ def run_search():
                 st.session_state.status_text.text(error_msg)
                 st.error(error_msg)
     
+    if capture is not None:
+        capture.close()
+    
     # 완료 처리
     st.session_state.is_running = False
     st.session_state.progress_bar.progress(1.0)
@@ -193,6 +268,10 @@ if st.button("🔍 검색 시작", type="primary", disabled=st.session_state.is_
         # 검색 시작
         st.session_state.is_running = True
         st.session_state.results = []
+        st.session_state.serp_path = (
+            f"/tmp/coupang_serp_{datetime.now().strftime('%Y%m%d_%H%M%S')}.parquet"
+            if full_capture else None
+        )
         
         # UI 요소들 생성
         st.session_state.progress_bar = st.progress(0)
@@ -200,6 +279,7 @@ if st.button("🔍 검색 시작", type="primary", disabled=st.session_state.is_
         st.session_state.results_placeholder = st.empty()
         
         # 별도 스레드에서 검색 실행
+        broker = get_crawl_broker()
         search_thread = threading.Thread(target=run_search, daemon=True)
         search_thread.start()
 
@@ -236,6 +316,8 @@ if debug_mode and st.session_state.is_running:
 
 # 결과 표시
 if st.session_state.results:
+    import pandas as pd
+    
     st.subheader("📊 검색 결과")
     
     # 데이터프레임으로 변환
@@ -277,6 +359,17 @@ if st.session_state.results:
         success_rate = (found_count / total_searches * 100) if total_searches > 0 else 0
         st.metric("성공률", f"{success_rate:.1f}%")
 
+# 전체 SERP 다운로드 - 대상 상품 순위 결과와 무관하게 표시
+serp_path = st.session_state.get('serp_path')
+if serp_path and not st.session_state.is_running and os.path.exists(serp_path):
+    with open(serp_path, "rb") as f:
+        st.download_button(
+            label="📥 전체 SERP Parquet 다운로드",
+            data=f.read(),
+            file_name=os.path.basename(serp_path),
+            mime="application/octet-stream"
+        )
+
 # 사이드바 정보
 with st.sidebar:
     st.header("ℹ️ 사용 가이드")
@@ -284,7 +377,7 @@ with st.sidebar:
     **IP 보호 메커니즘:**
     - Streamlit Cloud 서버에서 실행
     - 개인 IP 노출 없음
-    - 자동 트래픽 분산
+    - 프록시 풀 순환 (COUPANG_PROXIES 설정 시)
     
     **디버깅 기능:**
     - 실시간 로그 표시
@@ -300,7 +393,14 @@ with st.sidebar:
     
     st.header("🔧 디버깅 정보")
     st.text(f"서버 시간: {datetime.now().strftime('%H:%M:%S')}")
-    st.text("IP 보호: ✅ 활성")
+    proxy_pool = get_proxy_pool()
+    if proxy_pool:
+        proxy_stats = proxy_pool.stats()
+        available = len([p for p in proxy_stats if p['available']])
+        st.text(f"IP 분산: ✅ 프록시 {available}/{len(proxy_stats)}개 사용 가능")
+    else:
+        st.text("IP 분산: ⚠️ 프록시 미설정")
+    st.text(f"최대 브라우저: {get_max_browsers()}개")
     st.text("로그 레벨: INFO")
     st.text("스크린샷: ✅ 활성")
     
@@ -0,0 +1,78 @@
+import os
+import sys
+import subprocess
+
+import pytest
+
+from browser_profile import ProfileManager
+
+
+@pytest.fixture
+def profiles(tmp_path, monkeypatch):
+    manager = ProfileManager(root=str(tmp_path), max_workers=2)
+    # 백그라운드 정리 스레드 없이 테스트
+    monkeypatch.setattr(manager, "start_periodic_cleanup", lambda: None)
+    return manager
+
+
+def test_slots_are_exclusive(profiles):
+    first = profiles.acquire("pc")
+    second = profiles.acquire("pc")
+
+    assert first != second
+    assert profiles.acquire("pc") is None
+
+    profiles.release(first)
+    assert profiles.acquire("pc") == first
+
+
+def test_leftover_lock_file_with_reused_pid_is_free(profiles, tmp_path):
+    # 재시작한 컨테이너에서 같은 PID 를 받은 경우 - 파일 내용이 아니라 OS 잠금으로 판단
+    profile_dir = tmp_path / "pc" / "worker-0"
+    profile_dir.mkdir(parents=True)
+    (profile_dir / ProfileManager.LOCK_FILE).write_text(str(os.getpid()))
+
+    assert profiles.acquire("pc") == str(profile_dir)
+
+
+def test_lock_released_when_owner_process_dies(profiles, tmp_path):
+    script = (
+        "import sys, time\n"
+        "from browser_profile import ProfileManager\n"
+        f"ProfileManager(root={str(tmp_path)!r}, max_workers=1).acquire('pc')\n"
+        "print('locked', flush=True)\n"
+        "time.sleep(60)\n"
+    )
+    repo = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    child = subprocess.Popen(
+        [sys.executable, "-c", script], cwd=repo, stdout=subprocess.PIPE, text=True
+    )
+    try:
+        assert child.stdout.readline().strip() == "locked"
+        profiles.max_workers = 1
+        assert profiles.acquire("pc") is None
+    finally:
+        child.kill()
+        child.wait()
+        child.stdout.close()
+
+    assert profiles.acquire("pc") == str(tmp_path / "pc" / "worker-0")
+
+
+def test_cleanup_skips_profiles_in_use(profiles, tmp_path):
+    in_use = profiles.acquire("pc")
+    stale = profiles.acquire("pc")
+    profiles.release(stale)
+    os.remove(os.path.join(stale, ProfileManager.CREATED_FILE))
+
+    assert profiles.cleanup() == 1
+    assert os.path.isdir(in_use)
+    assert not os.path.exists(stale)
+
+
+def test_cleanup_thread_starts_on_first_acquire(tmp_path):
+    manager = ProfileManager(root=str(tmp_path), max_workers=1)
+    assert manager._cleanup_thread is None
+
+    manager.acquire("pc")
+    assert manager._cleanup_thread.is_alive()
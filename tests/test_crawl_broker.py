@@ -0,0 +1,169 @@
+import time
+import threading
+
+import pytest
+
+import crawl_broker
+from coupang_crawler import CoupangCrawler
+from crawl_broker import CrawlBroker
+
+TARGET = "https://www.coupang.com/vp/products/102"
+
+
+def serp_html(page):
+    return "".join(
+        f'<li class="search-product"><a href="/vp/products/{page * 100 + i}"><div class="name">상품</div></a></li>'
+        for i in range(3)
+    )
+
+
+class FakeCrawler(CoupangCrawler):
+    """브라우저 없이 fetch 하는 크롤러 - 호출 기록과 동시 실행 수를 남김"""
+
+    gate = None
+    calls = None
+    instances = None
+    active = 0
+    max_active = 0
+    lock = threading.Lock()
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.closed = False
+        self.fetched = False
+        self.instances.append(self)
+
+    def fetch(self, kw, page):
+        cls = type(self)
+        self.fetched = True
+        with cls.lock:
+            cls.calls.append((kw, page, self.extract))
+            cls.active += 1
+            cls.max_active = max(cls.max_active, cls.active)
+        try:
+            cls.gate.wait(5)
+            records = [] if self.extract == "network" else None
+            return {"html": serp_html(page), "records": records, "screenshot": None}
+        finally:
+            with cls.lock:
+                cls.active -= 1
+
+    def _quit(self):
+        self.closed = True
+
+
+@pytest.fixture
+def fake(monkeypatch):
+    FakeCrawler.gate = threading.Event()
+    FakeCrawler.calls = []
+    FakeCrawler.instances = []
+    FakeCrawler.active = FakeCrawler.max_active = 0
+    monkeypatch.setattr(crawl_broker, "CoupangCrawler", FakeCrawler)
+    return FakeCrawler
+
+
+@pytest.fixture
+def make_broker():
+    brokers = []
+
+    def make(**kwargs):
+        broker = CrawlBroker(factory=object(), **kwargs)
+        brokers.append(broker)
+        return broker
+
+    yield make
+    for broker in brokers:
+        broker.close()
+
+
+def run_threads(*targets):
+    results = [None] * len(targets)
+
+    def run(i, target):
+        results[i] = target()
+
+    threads = [threading.Thread(target=run, args=(i, target)) for i, target in enumerate(targets)]
+    for thread in threads:
+        thread.start()
+    return threads, results
+
+
+def wait_for(condition, timeout=5):
+    deadline = time.time() + timeout
+    while not condition():
+        assert time.time() < deadline, "timed out"
+        time.sleep(0.01)
+
+
+def test_same_request_is_fetched_once(fake, make_broker):
+    broker = make_broker(max_browsers=2)
+
+    threads, results = run_threads(*[lambda: broker.fetch("수건", "pc", 1)] * 3)
+    wait_for(lambda: fake.calls)
+    time.sleep(0.05)
+    fake.gate.set()
+    for thread in threads:
+        thread.join()
+
+    assert fake.calls == [("수건", 1, "dom")]
+    assert results[0] is results[1] is results[2]
+
+
+def test_different_extract_is_not_merged(fake, make_broker):
+    broker = make_broker(max_browsers=2)
+
+    threads, results = run_threads(
+        lambda: broker.fetch("수건", "pc", 1, extract="dom"),
+        lambda: broker.fetch("수건", "pc", 1, extract="network"),
+    )
+    wait_for(lambda: len(fake.calls) == 2)
+    fake.gate.set()
+    for thread in threads:
+        thread.join()
+
+    assert results[0]["records"] is None
+    assert results[1]["records"] == []
+
+
+def test_max_browsers_caps_concurrent_crawls(fake, make_broker):
+    broker = make_broker(max_browsers=1)
+
+    threads, _ = run_threads(*[lambda kw=kw: broker.fetch(kw, "pc", 1) for kw in ("수건", "타올", "행주")])
+    wait_for(lambda: fake.calls)
+    time.sleep(0.05)
+    assert len(fake.calls) == 1
+    fake.gate.set()
+    for thread in threads:
+        thread.join()
+
+    assert len(fake.calls) == 3
+    assert fake.max_active == 1
+    # 다른 키워드(시크릿 브라우저)는 가장 오래 쉰 유휴 브라우저를 닫고 슬롯을 넘겨받는다
+    assert broker._live == 1
+    assert sum(not crawler.closed for crawler in fake.instances) == 1
+
+
+def test_idle_browsers_expire(fake, make_broker):
+    fake.gate.set()
+    broker = make_broker(max_browsers=1, idle_seconds=0.05)
+
+    broker.fetch("수건", "pc", 1, incog=False)
+    crawler = fake.instances[-1]
+    assert not crawler.closed
+
+    wait_for(lambda: crawler.closed)
+    assert broker._live == 0
+
+
+def test_incognito_browser_retired_after_rank(fake, make_broker):
+    fake.gate.set()
+    broker = make_broker(max_browsers=2)
+
+    result = broker.rank("수건", TARGET, "pc", pages=2, incog=True)
+    assert result["rank"] == 3 and result["page"] == 1
+    incognito = [crawler for crawler in fake.instances if crawler.fetched]
+    assert len(incognito) == 1 and incognito[0].closed
+
+    broker.rank("수건", TARGET, "pc", pages=1, incog=False)
+    persistent = [crawler for crawler in fake.instances if crawler.fetched and not crawler.incog]
+    assert len(persistent) == 1 and not persistent[0].closed
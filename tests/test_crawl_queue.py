@@ -0,0 +1,164 @@
+import time
+
+import pytest
+
+import coupang_crawler
+from coupang_crawler import CrawlError
+from crawl_queue import SQLiteTaskQueue, TaskQueue, open_queue
+from crawl_worker import CrawlWorker, main
+
+TARGET = "https://www.coupang.com/vp/products/1234"
+
+
+@pytest.fixture
+def queue(tmp_path):
+    return SQLiteTaskQueue(str(tmp_path / "queue.db"), max_attempts=2)
+
+
+def test_task_queue_is_abstract():
+    with pytest.raises(TypeError):
+        TaskQueue()
+
+
+def test_lease_in_order_and_empty(queue):
+    first = queue.put("수건", "pc", TARGET, pages=3, options={"delay": 5})
+    second = queue.put("타올", "android", TARGET)
+
+    task = queue.lease("w1")
+    assert task["id"] == first
+    assert task["pages"] == 3
+    assert task["options"] == {"delay": 5}
+    assert task["attempts"] == 1
+    assert queue.lease("w2")["id"] == second
+    assert queue.lease("w3") is None
+
+
+def test_lease_returns_updated_row(queue):
+    queue.put("수건", "pc", TARGET)
+
+    before = time.time()
+    task = queue.lease("w1", lease_seconds=60)
+    assert task["status"] == "leased"
+    assert task["worker_id"] == "w1"
+    assert before + 60 <= task["lease_until"] <= time.time() + 60
+
+
+def test_put_many_keywords_by_platforms(queue):
+    task_ids = queue.put_many(["수건", "타올"], ["pc", "android"], TARGET, pages=2, options={"delay": 3})
+
+    assert len(task_ids) == 4
+    tasks = [queue.lease("w1") for _ in task_ids]
+    assert [(task["keyword"], task["platform"]) for task in tasks] == [
+        ("수건", "pc"), ("수건", "android"), ("타올", "pc"), ("타올", "android")
+    ]
+    assert all(task["pages"] == 2 and task["options"] == {"delay": 3} for task in tasks)
+
+
+def test_enqueue_command(tmp_path):
+    keywords_file = tmp_path / "keywords.txt"
+    keywords_file.write_text("행주\n\n", encoding="utf-8")
+    url = f"sqlite:///{tmp_path}/cli.db"
+
+    main(["--queue", url, "enqueue", "--target-url", TARGET, "-p", "pc", "-p", "android", "--keywords-file", str(keywords_file), "수건"])
+
+    queue = open_queue(url)
+    assert queue.counts() == {"pending": 4}
+    task = queue.lease("w1")
+    assert task["keyword"] == "수건"
+    assert task["options"] == {"delay": 8, "extract": "dom", "incog": True}
+
+
+def test_complete_stores_result(queue):
+    task_id = queue.put("수건", "pc", TARGET)
+    queue.lease("w1")
+
+    assert queue.complete(task_id, "w1", {"rank": 3, "product": "수건"})
+    assert queue.counts() == {"done": 1}
+    assert queue.results()[0]["result"] == {"rank": 3, "product": "수건"}
+
+
+def test_expired_lease_moves_to_another_worker(queue):
+    task_id = queue.put("수건", "pc", TARGET)
+    queue.lease("dead", lease_seconds=-1)
+
+    task = queue.lease("alive")
+    assert task["id"] == task_id
+    assert task["attempts"] == 2
+    # 임대를 잃은 워커는 연장/제출 불가
+    assert not queue.heartbeat(task_id, "dead")
+    assert not queue.complete(task_id, "dead", None)
+    assert queue.complete(task_id, "alive", None)
+
+
+def test_heartbeat_keeps_lease(queue):
+    task_id = queue.put("수건", "pc", TARGET)
+    queue.lease("w1", lease_seconds=-1)
+
+    assert queue.heartbeat(task_id, "w1", lease_seconds=300)
+    assert queue.lease("w2") is None
+
+
+def test_fail_retries_until_max_attempts(queue):
+    task_id = queue.put("수건", "pc", TARGET)
+
+    queue.lease("w1")
+    assert queue.fail(task_id, "w1", "boom")
+    assert queue.counts() == {"pending": 1}
+
+    queue.lease("w1")
+    assert queue.fail(task_id, "w1", "boom")
+    assert queue.counts() == {"failed": 1}
+    assert queue.results()[0]["error"] == "boom"
+    assert queue.lease("w1") is None
+
+
+def test_expired_lease_after_max_attempts_fails(queue):
+    queue.put("수건", "pc", TARGET)
+    queue.lease("w1", lease_seconds=-1)
+    queue.lease("w2", lease_seconds=-1)
+
+    assert queue.lease("w3") is None
+    assert queue.results()[0]["error"] == "lease expired"
+
+
+def test_open_queue(tmp_path):
+    assert isinstance(open_queue(str(tmp_path / "a.db")), SQLiteTaskQueue)
+    assert open_queue(f"sqlite:///{tmp_path}/b.db").path == f"{tmp_path}/b.db"
+    with pytest.raises(ValueError):
+        open_queue("redis://localhost")
+
+
+@pytest.fixture
+def worker(queue, monkeypatch):
+    monkeypatch.setattr(coupang_crawler.CoupangCrawler, "_quit", lambda self: None)
+    return CrawlWorker(queue, worker_id="w1", heartbeat_seconds=60)
+
+
+def test_worker_reports_crawl_failure(queue, worker, monkeypatch):
+    def rank(self, kw, tgt_url, pages=5, capture=None, raise_errors=False):
+        assert raise_errors
+        raise CrawlError("드라이버 빌드 실패")
+
+    monkeypatch.setattr(coupang_crawler.CoupangCrawler, "rank", rank)
+    queue.put("수건", "pc", TARGET)
+
+    assert worker.run_once()
+    assert queue.counts() == {"pending": 1}
+    assert worker.run_once()
+    assert queue.counts() == {"failed": 1}
+    assert not worker.run_once()
+
+
+def test_worker_completes_not_ranked(queue, worker, monkeypatch):
+    monkeypatch.setattr(coupang_crawler.CoupangCrawler, "rank", lambda self, *args, **kwargs: None)
+    queue.put("수건", "pc", TARGET)
+
+    assert worker.run_once()
+    assert queue.counts() == {"done": 1}
+    assert queue.results()[0]["result"] is None
+
+
+def test_worker_heartbeat_follows_lease(queue):
+    assert CrawlWorker(queue, lease_seconds=45).heartbeat_seconds == 15
+    with pytest.raises(ValueError):
+        CrawlWorker(queue, lease_seconds=45, heartbeat_seconds=60)
@@ -0,0 +1,71 @@
+from network_capture import parse_search_payload, payload_candidates, select_search_records
+
+
+def product(product_id, **extra):
+    return {"productId": product_id, "itemId": f"{product_id}1", "vendorItemId": f"{product_id}2", "productName": f"상품 {product_id}", **extra}
+
+
+def test_ad_flags_skip_organic_rank():
+    data = {"products": [
+        product("1"),
+        product("2", isAd=True),
+        product("3", adType="CPC"),
+        product("4", isAd="false"),
+        product("5", adFlag="N"),
+        product("6", sponsored=0),
+    ]}
+
+    records = parse_search_payload(data, "수건", "pc", 2)
+
+    assert [record["is_ad"] for record in records] == [False, True, True, False, False, False]
+    assert [record["rank"] for record in records] == [1, None, None, 2, 3, 4]
+    assert [record["position"] for record in records] == [1, 2, 3, 4, 5, 6]
+    assert records[0]["page"] == 2 and records[0]["keyword"] == "수건"
+
+
+def test_nested_lists_pick_largest_product_list():
+    data = {"data": {"banner": [product("9")], "result": {"items": [product("1"), product("2"), product("3")]}}}
+
+    records = parse_search_payload(data, "수건", "pc", 1)
+
+    assert [record["product_id"] for record in records] == ["1", "2", "3"]
+
+
+def test_missing_ids_and_names():
+    data = {"list": [
+        {"vendorItemId": 77},
+        {"productName": "ID 없음"},
+        {"productId": "", "vendorItemId": "", "name": "빈 ID"},
+    ]}
+
+    records = parse_search_payload(data, "수건", "pc", 1)
+
+    assert len(records) == 1
+    assert records[0]["product_id"] == "" and records[0]["item_id"] == ""
+    assert records[0]["vendor_id"] == "77"
+    assert records[0]["product"] == "상품명 추출 실패"
+
+
+def test_no_products():
+    assert parse_search_payload({"keyword": "수건", "list": [1, 2]}, "수건", "pc", 1) == []
+    assert payload_candidates([], "수건", "pc", 1) == []
+
+
+def test_select_prefers_list_matching_dom_cards():
+    recommended = {"recommend": [product(str(i)) for i in range(100, 140)]}
+    search = {"search": [product(str(i)) for i in range(1, 11)]}
+    candidates = payload_candidates(recommended, "수건", "pc", 1) + payload_candidates(search, "수건", "pc", 1)
+
+    records = select_search_records(candidates, [str(i) for i in range(1, 11)])
+
+    assert [record["product_id"] for record in records] == [str(i) for i in range(1, 11)]
+
+
+def test_select_rejects_lists_that_disagree_with_dom():
+    recommended = payload_candidates({"recommend": [product(str(i)) for i in range(100, 140)]}, "수건", "pc", 1)
+    # 추천 목록이 화면 카드 일부를 포함하더라도 대부분 다르면 채택하지 않음
+    partial = payload_candidates({"items": [product(str(i)) for i in range(1, 3)] + [product(str(i)) for i in range(200, 220)]}, "수건", "pc", 1)
+
+    assert select_search_records(recommended, [str(i) for i in range(1, 11)]) is None
+    assert select_search_records(partial, [str(i) for i in range(1, 11)]) is None
+    assert select_search_records(recommended, []) is None
@@ -0,0 +1,135 @@
+import types
+import threading
+import http.client
+import http.server
+import urllib.request
+
+import pytest
+
+import proxy_pool
+from proxy_pool import LocalForwardProxy, ProxyPool
+
+PROXIES = ["http://10.0.0.1:3128", "http://10.0.0.2:3128", "http://10.0.0.3:3128"]
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(proxy_pool, "time", types.SimpleNamespace(time=lambda: now[0]))
+    return now
+
+
+@pytest.fixture
+def pool(clock):
+    return ProxyPool(PROXIES, cooldown_seconds=100, max_failures=2)
+
+
+def test_from_env(monkeypatch):
+    monkeypatch.setenv("COUPANG_PROXIES", " http://a:1 ,\nhttp://b:2,, ")
+    assert len(ProxyPool.from_env()) == 2
+    monkeypatch.setenv("COUPANG_PROXIES", "")
+    assert ProxyPool.from_env() is None
+
+
+def test_least_loaded_assignment_and_release(pool):
+    assigned = [pool.acquire() for _ in range(4)]
+
+    assert sorted(assigned[:3]) == sorted(PROXIES)
+    assert {s["proxy"]: s["in_use"] for s in pool.stats()}[assigned[3]] == 2
+
+    pool.release(assigned[3])
+    pool.release(assigned[3])
+    pool.release(assigned[3])  # 0 아래로 내려가지 않음
+    assert {s["proxy"]: s["in_use"] for s in pool.stats()}[assigned[3]] == 0
+    assert pool.acquire() == assigned[3]
+
+
+def test_prefers_lower_block_rate_then_latency(pool):
+    pool.report(PROXIES[0], ok=True, latency=0.5)
+    pool.report(PROXIES[1], ok=True, latency=2.0)
+    pool.report(PROXIES[2], ok=True, latency=0.1)
+    pool.report(PROXIES[2], ok=False, blocked=True)
+
+    assert pool.acquire() == PROXIES[0]
+
+
+def test_block_cools_down_and_doubles(pool, clock):
+    pool.report(PROXIES[0], ok=False, blocked=True)
+    assert not pool.stats()[0]["available"]
+
+    clock[0] += 100
+    assert pool.stats()[0]["available"]
+
+    pool.report(PROXIES[0], ok=False, blocked=True)
+    clock[0] += 199
+    assert not pool.stats()[0]["available"]
+    clock[0] += 1
+    assert pool.stats()[0]["available"]
+
+    # 성공하면 연속 차단 횟수 초기화
+    pool.report(PROXIES[0], ok=True)
+    pool.report(PROXIES[0], ok=False, blocked=True)
+    clock[0] += 100
+    assert pool.stats()[0]["available"]
+
+
+def test_cooldown_after_max_failures(pool, clock):
+    pool.report(PROXIES[0], ok=False)
+    assert pool.stats()[0]["available"]
+
+    pool.report(PROXIES[0], ok=False)
+    assert not pool.stats()[0]["available"]
+    clock[0] += 100
+    assert pool.stats()[0]["available"]
+
+
+def test_all_cooling_down_returns_none(pool):
+    for proxy in PROXIES:
+        pool.report(proxy, ok=False, blocked=True)
+
+    assert pool.acquire() is None
+
+
+class Origin(http.server.BaseHTTPRequestHandler):
+    def do_GET(self):
+        body = f"origin {self.path}".encode()
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def origin():
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), Origin)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server.server_address
+    server.shutdown()
+    server.server_close()
+
+
+def test_local_forward_proxy_relays_http(origin):
+    host, port = origin
+    with LocalForwardProxy() as proxy:
+        pool = ProxyPool([proxy.url])
+        opener = urllib.request.build_opener(urllib.request.ProxyHandler({"http": pool.acquire()}))
+        with opener.open(f"http://{host}:{port}/search?q=1", timeout=5) as response:
+            assert response.read() == b"origin /search?q=1"
+        assert proxy.requests == 1
+
+
+def test_local_forward_proxy_tunnels_connect(origin):
+    host, port = origin
+    with LocalForwardProxy() as proxy:
+        proxy_host, proxy_port = proxy.url.rsplit("//", 1)[1].split(":")
+        conn = http.client.HTTPConnection(proxy_host, int(proxy_port), timeout=5)
+        conn.set_tunnel(host, port)
+        try:
+            conn.request("GET", "/tunnel")
+            assert conn.getresponse().read() == b"origin /tunnel"
+        finally:
+            conn.close()
+        assert proxy.requests == 1
@@ -0,0 +1,114 @@
+import os
+import queue
+import types
+import signal
+import logging
+
+import pytest
+from concurrent.futures.process import BrokenProcessPool
+
+import coupang_crawler
+from coupang_crawler import CoupangCrawler, CrawlError
+
+TARGET = "https://www.coupang.com/vp/products/201"
+
+
+def serp_html(page):
+    return "".join(
+        f'<li class="search-product"><a href="/vp/products/{page * 100 + i}"><div class="name">상품</div></a></li>'
+        for i in range(3)
+    )
+
+
+@pytest.fixture
+def crawler(monkeypatch, tmp_path):
+    screenshot = tmp_path / "loaded.png"
+    screenshot.write_bytes(b"png")
+    fetched = []
+
+    def fetch(self, kw, page):
+        if self.cancelled.is_set():
+            return None
+        fetched.append(page)
+        html = "<p>결과 없음</p>" if page == 1 else serp_html(page)
+        return {"html": html, "records": None, "screenshot": str(screenshot)}
+
+    monkeypatch.setattr(CoupangCrawler, "fetch", fetch)
+    monkeypatch.setattr(CoupangCrawler, "_build", lambda self: True)
+    crawler = CoupangCrawler(factory=object())
+    crawler.fetched = fetched
+    return crawler
+
+
+class Records(logging.Handler):
+    def __init__(self):
+        super().__init__(logging.INFO)
+        self.messages = []
+
+    def emit(self, record):
+        self.messages.append(record.getMessage())
+
+
+@pytest.fixture
+def messages():
+    handler = Records()
+    logger = logging.getLogger("coupang_crawler")
+    level = logger.level
+    logger.addHandler(handler)
+    logger.setLevel(logging.INFO)
+    yield handler.messages
+    logger.removeHandler(handler)
+    logger.setLevel(level)
+
+
+def test_rank_stops_after_target_found(crawler):
+    result = crawler.rank("수건", TARGET, pages=6)
+
+    assert (result["rank"], result["page"]) == (2, 2)
+    assert len(crawler.fetched) < 6
+
+
+def test_parse_logs_and_screenshots_reach_parent(crawler, messages):
+    crawler.rank("수건", TARGET, pages=3)
+
+    assert sum("순위 발견" in message for message in messages) == 1
+    assert any("상품 카드를 찾지 못함" in message for message in messages)
+    shots = [message.split(": ", 1)[1] for message in messages if message.startswith("📸 스크린샷 저장")]
+    assert any("found_rank_2" in shot for shot in shots)
+    assert any("no_products_page_1" in shot for shot in shots)
+    for shot in shots:
+        os.remove(shot)
+
+
+def test_failing_capture_does_not_block_pipeline(crawler):
+    class Broken:
+        def extend(self, records):
+            raise ValueError("boom")
+
+    assert crawler.rank("수건", "https://www.coupang.com/vp/products/999", pages=6, capture=Broken()) is None
+    assert crawler.fetched == [1, 2, 3, 4, 5, 6]
+
+
+@pytest.mark.filterwarnings("ignore::pytest.PytestUnhandledThreadExceptionWarning")
+def test_dead_rank_stage_stops_producer(crawler, monkeypatch):
+    class DyingQueue(queue.Queue):
+        def get(self, *args, **kwargs):
+            raise SystemExit  # 순위 스레드가 예외 처리 밖에서 죽는 경우
+
+    monkeypatch.setattr(coupang_crawler, "queue", types.SimpleNamespace(Queue=DyingQueue, Full=queue.Full))
+    monkeypatch.setattr(coupang_crawler, "PIPELINE_DEPTH", 1)
+
+    with pytest.raises(CrawlError, match="순위 계산 단계가 중단됨"):
+        crawler.rank("수건", TARGET, pages=6, raise_errors=True)
+
+
+def test_rank_recovers_from_broken_parse_pool(crawler):
+    pool = coupang_crawler.get_parse_pool()
+    os.kill(pool.submit(os.getpid).result(), signal.SIGKILL)
+    with pytest.raises(BrokenProcessPool):
+        pool.submit(os.getpid).result()
+
+    result = crawler.rank("수건", TARGET, pages=3)
+    assert result["rank"] == 2
+    assert coupang_crawler.get_parse_pool() is not pool
+    assert crawler.rank("수건", TARGET, pages=3)["rank"] == 2
@@ -0,0 +1,82 @@
+from datetime import datetime
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+
+from serp_export import SERP_SCHEMA, SerpCapture, load_serp
+
+
+def record(position, product_id="1234", item_id="", vendor_id="5678", is_ad=False):
+    return {
+        "time": datetime(2026, 1, 1, 12, 0, 0),
+        "keyword": "수건",
+        "platform": "pc",
+        "page": 1,
+        "position": position,
+        "rank": None if is_ad else position,
+        "is_ad": is_ad,
+        "product_id": product_id,
+        "item_id": item_id,
+        "vendor_id": vendor_id,
+        "product": f"상품 {position}",
+    }
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / "serp.parquet")
+
+
+def test_round_trip_schema_and_values(path):
+    with SerpCapture(path) as capture:
+        capture.extend([record(1), record(2, is_ad=True)])
+
+    table = pq.read_table(path)
+    # Parquet 에는 초 단위 timestamp 가 없어 time 은 ms 로 읽힌다
+    assert table.schema.names == SERP_SCHEMA.names
+    assert table.schema.field("product_id").type == pa.int64()
+    assert pa.types.is_dictionary(table.schema.field("keyword").type)
+    assert pa.types.is_dictionary(table.schema.field("platform").type)
+
+    rows = table.to_pylist()
+    assert [row["position"] for row in rows] == [1, 2]
+    assert rows[0]["product_id"] == 1234
+    assert rows[1]["rank"] is None and rows[1]["is_ad"]
+
+
+def test_non_numeric_ids_become_null(path):
+    with SerpCapture(path) as capture:
+        capture.add(record(1, product_id="abc", item_id="", vendor_id=None))
+        capture.add(record(2, product_id="9" * 19))
+        capture.add(record(3, product_id="１２３"))
+        capture.add(record(4, product_id=" 42 "))
+
+    rows = pq.read_table(path).to_pylist()
+    assert [row["product_id"] for row in rows] == [None, None, None, 42]
+    assert rows[0]["item_id"] is None and rows[0]["vendor_id"] is None
+
+
+def test_batches_flush_to_row_groups(path):
+    capture = SerpCapture(path, batch_size=2)
+    capture.extend(record(i) for i in range(1, 6))
+    assert capture.rows == 4
+    capture.close()
+
+    assert capture.rows == 5
+    assert pq.ParquetFile(path).metadata.num_row_groups == 3
+
+
+def test_load_serp_categories(path):
+    pytest.importorskip("pandas")
+    with SerpCapture(path) as capture:
+        capture.add(record(1))
+
+    frame = load_serp(path)
+    assert str(frame["keyword"].dtype) == "category"
+    assert frame["keyword"].iloc[0] == "수건"
+
+
+def test_empty_capture_writes_nothing(path, tmp_path):
+    SerpCapture(path).close()
+    assert not (tmp_path / "serp.parquet").exists()